@@ -1,13 +1,32 @@
-from fastapi import APIRouter, Request, HTTPException
-from app.schemas.size_suggestion import PredictRequest, PredictResponse
-from app.services.predictor import Predictor
+import secrets
+import time
+from fastapi import APIRouter, Header, Request, HTTPException
+from app.schemas.size_suggestion import (
+    PredictRequest,
+    PredictResponse,
+    BatchPredictRequest,
+    BatchPredictResponse,
+    ModelReloadRequest,
+)
+from app.core import metrics
+from app.core.config import settings
+from app.core.executor import ExecutorSaturated, get_inference_executor
 from app.core.logging import get_logger
-from typing import Dict, Any
+from app.services import inference_tasks
+from app.services.model_reloader import ReloadInProgress, get_model_reloader
+from typing import Dict, Any, List, Optional
 
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+PREDICTION_SECONDS = metrics.histogram(
+    "size_prediction_seconds", "Single prediction latency per model, cache hits included", ["model_type", "cache"]
+)
+BATCH_PREDICTION_SECONDS = metrics.histogram(
+    "size_batch_prediction_seconds", "Time to score one model's rows of a batch request", ["model_type"]
+)
+
 @router.get("/")
 async def root():
     return {"message": "Size Suggestion API is running."}
@@ -28,20 +47,112 @@ async def predict(request: Request, body: PredictRequest):
             detail=f"Model '{model_type}' is not available. Please select a different model."
         )
     
-    model = model_loader.get_model(model_type)
-    preprocessor = model_loader.get_preprocessor()
-    predictor = Predictor(model, model_type, preprocessor)
+    start = time.perf_counter()
+    cache = model_loader.get_prediction_cache()
+    cache_key = cache.key_for(body)
+    generation = cache.generation
+    
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Prediction cache hit for %s", cache_key)
+        PREDICTION_SECONDS.labels(model_type, "hit").observe(time.perf_counter() - start)
+        return cached
     
     try:
-        result = predictor.predict(body)
-        logger.info(f"Prediction successful using {model_type}: {result.recommended_size}")
+        result = await get_inference_executor().run(inference_tasks.predict_size, model_type, body)
+        cache.put(cache_key, result, generation=generation)
+        PREDICTION_SECONDS.labels(model_type, "miss").observe(time.perf_counter() - start)
+        logger.info("Prediction successful using %s: %s", model_type, result.recommended_size)
         return result
+    except ExecutorSaturated as e:
+        logger.warning(f"Prediction rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Prediction failed with {model_type}: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+@router.post("/predict/batch", response_model=BatchPredictResponse)
+async def predict_batch(request: Request, body: BatchPredictRequest):
+    model_loader = request.app.state.model_loader
+    
+    if not model_loader.is_ready():
+        raise HTTPException(status_code=503, detail="No models loaded")
+    
+    if len(body.items) > settings.PREDICT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(body.items)} rows (max {settings.PREDICT_BATCH_MAX_SIZE})"
+        )
+    
+    # Group row positions by model so each model runs once over its rows
+    rows_by_model: Dict[str, List[int]] = {}
+    for position, item in enumerate(body.items):
+        rows_by_model.setdefault(item.model_type.value, []).append(position)
+    
+    for model_type in rows_by_model:
+        if not model_loader.is_model_ready(model_type):
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model '{model_type}' is not available. Please select a different model."
+            )
+    
+    predictions: List[PredictResponse] = [None] * len(body.items)
+    
+    executor = get_inference_executor()
+    
+    for model_type, positions in rows_by_model.items():
+        start = time.perf_counter()
+        try:
+            results = await executor.run(
+                inference_tasks.predict_size_batch, model_type, [body.items[p] for p in positions]
+            )
+        except ExecutorSaturated as e:
+            logger.warning(f"Batch prediction rejected: {e}")
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        except Exception as e:
+            logger.error(f"Batch prediction failed with {model_type}: {e}")
+            raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        
+        BATCH_PREDICTION_SECONDS.labels(model_type).observe(time.perf_counter() - start)
+        for position, result in zip(positions, results):
+            predictions[position] = result
+    
+    logger.info("Batch prediction successful for %d rows", len(body.items))
+    return BatchPredictResponse(predictions=predictions)
+
+
 @router.get("/models")
 async def get_models(request: Request) -> Dict[str, Any]:
     model_loader = request.app.state.model_loader
-    return model_loader.get_status()
+    status = model_loader.get_status()
+    reloader = get_model_reloader()
+    status["reload"] = reloader.get_stats() if reloader else None
+    return status
+
+
+@router.post("/models/reload")
+async def reload_models(
+    body: Optional[ModelReloadRequest] = None,
+    x_admin_token: Optional[str] = Header(default=None)
+) -> Dict[str, Any]:
+    """Load the model files on disk, check them on canary inputs and swap them in."""
+    if not settings.MODEL_RELOAD_TOKEN:
+        raise HTTPException(status_code=403, detail="Model reload is disabled (MODEL_RELOAD_TOKEN is not set)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.MODEL_RELOAD_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    
+    reloader = get_model_reloader()
+    if reloader is None:
+        raise HTTPException(status_code=503, detail="Model reloader is not running")
+    
+    try:
+        result = await reloader.reload(model_version=body.model_version if body else None)
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if result["status"] == "rejected":
+        raise HTTPException(status_code=422, detail=result)
+    if result["status"] == "failed":
+        raise HTTPException(status_code=500, detail=result)
+    return result
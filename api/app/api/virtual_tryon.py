@@ -1,213 +1,274 @@
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
-from gradio_client import Client, handle_file
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+import asyncio
 import logging
 import time
-from uuid import uuid4
+from pathlib import Path
+from typing import Dict, Optional
 
-import os
-from google import genai
 from app.core.config import settings
-from google.genai.types import (
-    Image,
-    ProductImage,
-    RecontextImageConfig,
-    RecontextImageSource,
-)
-from app.schemas.virtual_tryon import GarmentCategory, VirtualTryOnResponse
+from app.schemas.virtual_tryon import GarmentCategory, VirtualTryOnResponse, TryOnJobResponse
 from app.services.file_handler import (
-    save_upload_file,
-    save_result_image,
+    OUTPUT_TEMP_DIR,
+    SavedUpload,
+    stream_upload_file,
     cleanup_files,
-    cleanup_old_files,
-    UPLOAD_TEMP_DIR,
-    OUTPUT_TEMP_DIR
+    run_file_io,
 )
 from app.services.garment_classifier import get_garment_classifier
+from app.services import inference_tasks
+from app.services.micro_batcher import MicroBatcher
+from app.services.garment_cache import GarmentVerdictCache
+from app.services.result_cache import TryOnResultCache
+from app.services.single_flight import SingleFlight
+from app.services.tryon_backends import (
+    IMAGE_SCALE,
+    N_STEPS,
+    SEED,
+    TryOnRequest,
+    backend_for,
+    get_backend_pool,
+    request_key,
+    result_key,
+    run_tryon,
+)
+from app.services.tryon_jobs import JobQueueFull, get_job_queue
+from app.services.backend_pool import BackendBusy
+from app.core.executor import ExecutorSaturated, get_inference_executor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize Client
-OOTDIFFUSION_CLIENT = None
-VERTEXAI_CLIENT = None
+GARMENT_BATCHER = None
+GARMENT_CACHE = None
+RESULT_CACHE = None
+# Identical try-ons running at the same time share one backend call
+TRYON_FLIGHTS = SingleFlight("tryon")
 
-def get_ootdiffusion_client():
-    global OOTDIFFUSION_CLIENT
-    if OOTDIFFUSION_CLIENT is None:
-        try:
-            OOTDIFFUSION_CLIENT = Client("levihsu/OOTDiffusion")
-            logger.info("OOTDiffusion client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize OOTDiffusion client: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to connect to OOTDiffusion service")
-    return OOTDIFFUSION_CLIENT
-
-def get_vertexai_client():
-    global VERTEXAI_CLIENT
-    if VERTEXAI_CLIENT is None:
-        try:
-            VERTEXAI_CLIENT = genai.Client(
-                vertexai=settings.GOOGLE_GENAI_USE_VERTEXAI,
-                project=settings.GOOGLE_CLOUD_PROJECT,
-                location=settings.GOOGLE_CLOUD_LOCATION
-            )
-            logger.info("Vertex AI client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Vertex AI client: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to connect to Vertex AI service")
-    return VERTEXAI_CLIENT
-
-async def _validate_garment(garm_img: UploadFile) -> bytes:
+async def _classify_garment_batch(images: list[Path]) -> list[tuple[bool, str, float]]:
+    return await get_inference_executor().run(inference_tasks.classify_garments, images)
+
+def get_garment_batcher() -> MicroBatcher:
+    global GARMENT_BATCHER
+    if GARMENT_BATCHER is None:
+        GARMENT_BATCHER = MicroBatcher(
+            _classify_garment_batch,
+            max_batch_size=settings.GARMENT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.GARMENT_BATCH_MAX_WAIT_MS
+        )
+    return GARMENT_BATCHER
+
+async def get_garment_cache() -> GarmentVerdictCache:
+    global GARMENT_CACHE
+    classifier = get_garment_classifier()
+    model_id = classifier.model_id if classifier is not None else ""
+    if GARMENT_CACHE is not None and GARMENT_CACHE.model_id == model_id:
+        return GARMENT_CACHE
+
+    # Opening the SQLite file prunes it, so build the cache on the file I/O pool
+    cache = await run_file_io(
+        GarmentVerdictCache,
+        settings.GARMENT_CACHE_SIZE,
+        model_id,
+        settings.GARMENT_CACHE_PATH,
+        settings.GARMENT_CACHE_DISK_MAX_ENTRIES
+    )
+    if GARMENT_CACHE is not None and GARMENT_CACHE.model_id == model_id:
+        # Another request built one for this model meanwhile
+        await run_file_io(cache.close)
+        return GARMENT_CACHE
+
+    previous, GARMENT_CACHE = GARMENT_CACHE, cache
+    if previous is not None:
+        await run_file_io(previous.close)
+    return cache
+
+def get_result_cache() -> TryOnResultCache:
+    global RESULT_CACHE
+    if RESULT_CACHE is None:
+        # Outputs expire from disk after TEMP_RETENTION_HOURS, so entries never outlive them
+        RESULT_CACHE = TryOnResultCache(
+            settings.TRYON_RESULT_CACHE_SIZE,
+            OUTPUT_TEMP_DIR,
+            ttl_seconds=settings.TEMP_RETENTION_HOURS * 3600
+        )
+    return RESULT_CACHE
+
+async def _validate_garment(garment: SavedUpload):
     
     classifier = get_garment_classifier()
     if classifier is None or not classifier.is_ready():
         logger.warning("Garment classifier not available - skipping content check")
-        garm_img_bytes = await garm_img.read()
-        await garm_img.seek(0)
-        return garm_img_bytes
+        return
 
-    garm_img_bytes = await garm_img.read()
-    await garm_img.seek(0)
+    cache = await get_garment_cache()
+    # A memory miss falls through to SQLite, so keep it off the event loop
+    verdict = await run_file_io(cache.get_verdict, garment.digest)
+    if verdict is None:
+        try:
+            verdict = await get_garment_batcher().submit(garment.path)
+        except ExecutorSaturated as e:
+            logger.warning(f"Garment classification rejected: {e}")
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        await run_file_io(cache.put_verdict, garment.digest, verdict)
+        logger.info("Garment classified as '%s' (%.1f%%)", verdict[1], verdict[2] * 100)
+    else:
+        logger.info("Garment verdict cached as '%s' (%.1f%%)", verdict[1], verdict[2] * 100)
 
-    restricted, class_name, confidence = classifier.is_restricted(garm_img_bytes)
-    logger.info(f"Garment classified as '{class_name}' ({confidence:.1%})")
+    restricted, class_name, confidence = verdict
 
     if restricted:
         logger.warning(f"Blocked restricted garment class: {class_name} ({confidence:.1%})")
         raise HTTPException(status_code=400, detail="Inappropriate Garment Detected")
 
-    return garm_img_bytes
+async def _timed(timings: Dict[str, float], stage: str, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = time.perf_counter() - start
 
-@router.post("/try-on-hd", response_model=VirtualTryOnResponse)
-async def virtual_try_on_hd(
-    vton_img: UploadFile = File(..., description="Person image"),
-    garm_img: UploadFile = File(..., description="Garment image")
-):
-    await _validate_garment(garm_img)
-    start_time = time.time()
-    
-    # Cleanup old files periodically
-    cleanup_old_files(UPLOAD_TEMP_DIR)
-    cleanup_old_files(OUTPUT_TEMP_DIR)
-    
-    # Default parameters
-    n_samples = 1
-    n_steps = 20
-    image_scale = 2.0
-    seed = -1
-    
-    vton_path = None
-    garm_path = None
-    
+async def _save_garment(garm_img: UploadFile) -> SavedUpload:
+    garm_upload = await stream_upload_file(garm_img, prefix="garment")
     try:
-        client = get_ootdiffusion_client()
-        
-        # Save uploaded files to temp/upload folder
-        vton_path = await save_upload_file(vton_img, prefix="person")
-        garm_path = await save_upload_file(garm_img, prefix="garment")
-        
-        logger.info(f"Processing try-on (VITON-HD Dataset)")
-        
-        # Call OOTDiffusion API
-        result = client.predict(
-            handle_file(str(vton_path)),
-            handle_file(str(garm_path)),
-            n_samples,
-            n_steps,
-            image_scale,
-            seed,
-            api_name="/process_hd"
-        )
-        
-        result_image = result[0]['image'] if isinstance(result, list) and len(result) > 0 else result
-        output_path = save_result_image(result_image, prefix="hd_tryon")
-        
-        processing_time = time.time() - start_time
-    
-        image_url = f"/outputs/{output_path.name}"
-        logger.info(f"HD try-on completed in {processing_time:.2f}s")
-        
-        return VirtualTryOnResponse(
-            image_url=image_url,
-            message="Virtual try-on completed successfully",
-            category="Upper Body",
-            processing_time=processing_time
-        )
-        
+        await _validate_garment(garm_upload)
+    except BaseException:
+        await cleanup_files(garm_upload.path)
+        raise
+    return garm_upload
+
+async def _save_uploads(vton_img: UploadFile, garm_img: UploadFile, mode: str) -> tuple[SavedUpload, SavedUpload, Dict[str, float]]:
+    # The garment check and the person upload do not depend on each other,
+    # so they run side by side. The backend clients start connecting in the
+    # background without being waited for: a cached result or a queued job
+    # never needs them here, and the backend call itself waits for them
+    # (and reports a failed connect, which the pool logs).
+    get_backend_pool(backend_for(mode)).start()
+    timings: Dict[str, float] = {}
+    garment = asyncio.create_task(_timed(timings, "garment_check", _save_garment(garm_img)))
+    person = asyncio.create_task(_timed(timings, "person_upload", stream_upload_file(vton_img, prefix="person")))
+    uploads = (garment, person)
+    try:
+        done, _ = await asyncio.wait(uploads, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+        return person.result(), garment.result(), timings
+    except BaseException:
+        # Writes on the file I/O pool cannot be interrupted, so let the
+        # uploads settle and remove whatever landed
+        await asyncio.wait(uploads)
+        await cleanup_files(*(
+            task.result().path for task in uploads
+            if not task.cancelled() and task.exception() is None
+        ))
+        raise
+
+def _tryon_request(mode: str, vton: SavedUpload, garm: SavedUpload, timings: Dict[str, float], **params) -> TryOnRequest:
+    return TryOnRequest(
+        mode, vton.path, garm.path,
+        vton_digest=vton.digest, garm_digest=garm.digest,
+        timings=timings,
+        **params
+    )
+
+async def _cached_result(request: TryOnRequest) -> Optional[VirtualTryOnResponse]:
+    key = result_key(request)
+    if key is None:
+        return None
+    cached = await run_file_io(get_result_cache().get_result, key)
+    if cached is None:
+        return None
+    logger.info("Try-on result served from cache: %s", cached.image_url)
+    return cached
+
+def _for_request(request: TryOnRequest, response: VirtualTryOnResponse) -> VirtualTryOnResponse:
+    # Cached and shared responses carry another request's clock
+    return response.model_copy(update={
+        "processing_time": time.time() - request.started_at,
+        "timings": dict(request.timings),
+    })
+
+async def _execute(request: TryOnRequest) -> VirtualTryOnResponse:
+    try:
+        response = await run_tryon(request)
+        key = result_key(request)
+        if key is not None:
+            get_result_cache().put_result(key, response)
+        return response
+    finally:
+        await cleanup_files(request.vton_path, request.garm_path)
+
+async def _run_tryon(request: TryOnRequest, label: str) -> VirtualTryOnResponse:
+    # The leader's uploads are removed by the shared call itself, which may
+    # outlive this request; callers that joined it clean up their own copies
+    owns_files = True
+    start = time.perf_counter()
+    try:
+        response = await _cached_result(request)
+        if response is None:
+            key = request_key(request)
+            if key is None:
+                owns_files = False
+                response = await _execute(request)
+            else:
+                task, leader = TRYON_FLIGHTS.join(key, lambda: _execute(request))
+                if leader:
+                    owns_files = False
+                else:
+                    logger.info("Joined in-flight %s try-on", label)
+                response = await asyncio.shield(task)
+        request.timings["tryon"] = time.perf_counter() - start
+        return _for_request(request, response)
     except HTTPException:
         raise
+    except BackendBusy as e:
+        logger.warning(f"Try-on rejected: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
-        logger.error(f"Error in virtual try-on HD: {str(e)}")
+        logger.error(f"Error in virtual try-on {label}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Virtual try-on failed: {str(e)}")
     finally:
-        cleanup_files(vton_path, garm_path)
+        if owns_files:
+            await cleanup_files(request.vton_path, request.garm_path)
+
+async def _submit_job(request: TryOnRequest, label: str) -> TryOnJobResponse:
+    cached = await _cached_result(request)
+    if cached is not None:
+        await cleanup_files(request.vton_path, request.garm_path)
+        return get_job_queue().add_finished(request.mode, backend_for(request.mode), _for_request(request, cached)).to_response()
+    try:
+        job = get_job_queue().submit(request.mode, backend_for(request.mode), lambda: _run_tryon(request, label))
+    except JobQueueFull as e:
+        logger.warning(f"Try-on job rejected: {e}")
+        await cleanup_files(request.vton_path, request.garm_path)
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    return job.to_response()
+
+
+@router.post("/try-on-hd", response_model=VirtualTryOnResponse)
+async def virtual_try_on_hd(
+    vton_img: UploadFile = File(..., description="Person image"),
+    garm_img: UploadFile = File(..., description="Garment image"),
+    n_steps: int = Form(N_STEPS, ge=20, le=40, description="Diffusion steps"),
+    image_scale: float = Form(IMAGE_SCALE, ge=1.0, le=5.0, description="Guidance scale"),
+    seed: int = Form(SEED, ge=-1, le=2147483647, description="Random seed (-1 for random; fixed seeds are cached)")
+):
+    uploads = await _save_uploads(vton_img, garm_img, "hd")
+    return await _run_tryon(_tryon_request("hd", *uploads, n_steps=n_steps, image_scale=image_scale, seed=seed), "HD")
 
 
 @router.post("/try-on-dc", response_model=VirtualTryOnResponse)
 async def virtual_try_on_dc(
     vton_img: UploadFile = File(..., description="Person image"),
     garm_img: UploadFile = File(..., description="Garment image"),
-    category: GarmentCategory = Form(GarmentCategory.UPPER_BODY, description="Garment category")
+    category: GarmentCategory = Form(GarmentCategory.UPPER_BODY, description="Garment category"),
+    n_steps: int = Form(N_STEPS, ge=20, le=40, description="Diffusion steps"),
+    image_scale: float = Form(IMAGE_SCALE, ge=1.0, le=5.0, description="Guidance scale"),
+    seed: int = Form(SEED, ge=-1, le=2147483647, description="Random seed (-1 for random; fixed seeds are cached)")
 ):
-    await _validate_garment(garm_img)
-    start_time = time.time()
-    
-    # Cleanup old files periodically
-    cleanup_old_files(UPLOAD_TEMP_DIR)
-    cleanup_old_files(OUTPUT_TEMP_DIR)
-    
-    # Default parameters
-    n_samples = 1
-    n_steps = 20
-    image_scale = 2.0
-    seed = -1
-    
-    vton_path = None
-    garm_path = None
-    
-    try:
-        client = get_ootdiffusion_client()
-        
-        vton_path = await save_upload_file(vton_img, prefix="person")
-        garm_path = await save_upload_file(garm_img, prefix="garment")
-        
-        logger.info(f"Processing try-on (Dresscode dataset)")
-    
-        result = client.predict(
-            vton_img=handle_file(str(vton_path)),
-            garm_img=handle_file(str(garm_path)),
-            category=category.value,
-            n_samples=n_samples,
-            n_steps=n_steps,
-            image_scale=image_scale,
-            seed=seed,
-            api_name="/process_dc"
-        )
-
-        result_image = result[0]['image'] if isinstance(result, list) and len(result) > 0 else result
-        output_path = save_result_image(result_image, prefix=f"dc_tryon_{category.value.lower()}")
-        
-        processing_time = time.time() - start_time
-        
-        image_url = f"/outputs/{output_path.name}"
-        
-        logger.info(f"DC try-on completed in {processing_time:.2f}s")
-        
-        return VirtualTryOnResponse(
-            image_url=image_url,
-            message="Virtual try-on completed successfully",
-            category=category.value,
-            processing_time=processing_time
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in virtual try-on DC: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Virtual try-on failed: {str(e)}")
-    finally:
-        cleanup_files(vton_path, garm_path)
+    uploads = await _save_uploads(vton_img, garm_img, "dc")
+    return await _run_tryon(_tryon_request("dc", *uploads, category=category, n_steps=n_steps, image_scale=image_scale, seed=seed), "DC")
 
 
 @router.post("/try-on-gemini", response_model=VirtualTryOnResponse)
@@ -215,62 +276,69 @@ async def virtual_try_on_gemini(
     vton_img: UploadFile = File(..., description="Person image"),
     garm_img: UploadFile = File(..., description="Garment image"),
 ):
-    await _validate_garment(garm_img)
-    start_time = time.time()
-    
-    # Cleanup old files periodically
-    cleanup_old_files(UPLOAD_TEMP_DIR)
-    cleanup_old_files(OUTPUT_TEMP_DIR)
-    
-    vton_path = None
-    garm_path = None
-    
-    try:
-        client = get_vertexai_client()
-    
-        vton_path = await save_upload_file(vton_img, prefix="person")
-        garm_path = await save_upload_file(garm_img, prefix="garment")
-        
-        logger.info(f"Processing Google Vertex try-on")
-        
-        response = client.models.recontext_image(
-            model=settings.VIRTUAL_TRY_ON_MODEL,
-            source=RecontextImageSource(
-                person_image=Image.from_file(location=str(vton_path)),
-                product_images=[
-                    ProductImage(product_image=Image.from_file(location=str(garm_path)))
-                ],
-            ),
-            config=RecontextImageConfig(
-                output_mime_type="image/jpeg",
-                number_of_images=1,
-                safety_filter_level="BLOCK_LOW_AND_ABOVE",
-            )
-        )
-        
-        result_image = response.generated_images[0].image
-        
-        unique_filename = f"gemini_tryon_{uuid4().hex}.jpeg"
-        output_path = OUTPUT_TEMP_DIR / unique_filename
-        result_image.save(str(output_path))
-        
-        processing_time = time.time() - start_time
-        
-        image_url = f"/outputs/{output_path.name}"
-        
-        logger.info(f"Google Vertex try-on completed in {processing_time:.2f}s")
-        
-        return VirtualTryOnResponse(
-            image_url=image_url,
-            message="Virtual try-on completed successfully",
-            category="Google Vertex",
-            processing_time=processing_time
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in virtual try-on Google Vertex: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Virtual try-on failed: {str(e)}")
-    finally:
-        cleanup_files(vton_path, garm_path)
\ No newline at end of file
+    uploads = await _save_uploads(vton_img, garm_img, "gemini")
+    return await _run_tryon(_tryon_request("gemini", *uploads), "Google Vertex")
+
+
+# Job mode: uploads are checked and saved up front, then the try-on runs in
+# the background and the client polls or streams the job status
+
+@router.post("/jobs/try-on-hd", response_model=TryOnJobResponse, status_code=202)
+async def submit_try_on_hd(
+    vton_img: UploadFile = File(..., description="Person image"),
+    garm_img: UploadFile = File(..., description="Garment image"),
+    n_steps: int = Form(N_STEPS, ge=20, le=40, description="Diffusion steps"),
+    image_scale: float = Form(IMAGE_SCALE, ge=1.0, le=5.0, description="Guidance scale"),
+    seed: int = Form(SEED, ge=-1, le=2147483647, description="Random seed (-1 for random; fixed seeds are cached)")
+):
+    uploads = await _save_uploads(vton_img, garm_img, "hd")
+    return await _submit_job(_tryon_request("hd", *uploads, n_steps=n_steps, image_scale=image_scale, seed=seed), "HD")
+
+
+@router.post("/jobs/try-on-dc", response_model=TryOnJobResponse, status_code=202)
+async def submit_try_on_dc(
+    vton_img: UploadFile = File(..., description="Person image"),
+    garm_img: UploadFile = File(..., description="Garment image"),
+    category: GarmentCategory = Form(GarmentCategory.UPPER_BODY, description="Garment category"),
+    n_steps: int = Form(N_STEPS, ge=20, le=40, description="Diffusion steps"),
+    image_scale: float = Form(IMAGE_SCALE, ge=1.0, le=5.0, description="Guidance scale"),
+    seed: int = Form(SEED, ge=-1, le=2147483647, description="Random seed (-1 for random; fixed seeds are cached)")
+):
+    uploads = await _save_uploads(vton_img, garm_img, "dc")
+    return await _submit_job(_tryon_request("dc", *uploads, category=category, n_steps=n_steps, image_scale=image_scale, seed=seed), "DC")
+
+
+@router.post("/jobs/try-on-gemini", response_model=TryOnJobResponse, status_code=202)
+async def submit_try_on_gemini(
+    vton_img: UploadFile = File(..., description="Person image"),
+    garm_img: UploadFile = File(..., description="Garment image"),
+):
+    uploads = await _save_uploads(vton_img, garm_img, "gemini")
+    return await _submit_job(_tryon_request("gemini", *uploads), "Google Vertex")
+
+
+@router.get("/jobs/{job_id}", response_model=TryOnJobResponse)
+async def get_try_on_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_try_on_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        while True:
+            yield f"event: status\ndata: {job.to_response().model_dump_json()}\n\n"
+            if job.finished:
+                return
+            # Keep idle connections alive through proxies while the job runs
+            status = job.status
+            while job.status == status and not await job.wait_for_change(settings.TRYON_JOB_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
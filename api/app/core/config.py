@@ -17,6 +17,43 @@ class Settings(BaseSettings):
     GOOGLE_CLOUD_LOCATION: str
     GOOGLE_GENAI_USE_VERTEXAI: bool = True
     VIRTUAL_TRY_ON_MODEL: str
+    PREDICT_BATCH_MAX_SIZE: int = 10000
+    PREDICTION_CACHE_SIZE: int = 10000
+    PREDICTION_CACHE_TTL: float = 3600
+    SIZE_LOOKUP_DIR: str = ""
+    MODEL_RELOAD_TOKEN: str = ""
+    MODEL_RELOAD_WATCH_SECONDS: float = 0
+    STARTUP_PARALLEL_LOAD: bool = True
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 4
+    INFERENCE_MAX_CONCURRENCY: int = 0
+    INFERENCE_MAX_QUEUE: int = 0
+    GARMENT_BATCH_MAX_SIZE: int = 8
+    GARMENT_BATCH_MAX_WAIT_MS: float = 5.0
+    GARMENT_FAST_DECODE: bool = True
+    GARMENT_CACHE_SIZE: int = 4096
+    GARMENT_CACHE_PATH: str = ""
+    GARMENT_CACHE_DISK_MAX_ENTRIES: int = 100000
+    FILE_IO_WORKERS: int = 4
+    TEMP_RETENTION_HOURS: float = 24
+    TEMP_QUOTA_MB: int = 0
+    JANITOR_INTERVAL_SECONDS: float = 60
+    JANITOR_RESCAN_HOURS: float = 6
+    BACKEND_ORPHAN_MAX_AGE_SECONDS: float = 600
+    TRYON_JOB_WORKERS_OOTDIFFUSION: int = 2
+    TRYON_JOB_WORKERS_VERTEX: int = 4
+    TRYON_JOB_MAX_QUEUE: int = 100
+    TRYON_JOB_RETENTION_SECONDS: float = 3600
+    TRYON_JOB_KEEPALIVE_SECONDS: float = 15
+    TRYON_RESULT_CACHE_SIZE: int = 1024
+    TRYON_NORMALIZE_IMAGES: bool = True
+    OOTDIFFUSION_SPACE: str = "levihsu/OOTDiffusion"
+    OOTDIFFUSION_CLIENTS: int = 1
+    OOTDIFFUSION_MAX_IN_FLIGHT: int = 2
+    VERTEX_CLIENTS: int = 1
+    VERTEX_MAX_IN_FLIGHT: int = 4
+    BACKEND_MAX_WAITING: int = 0
+    BACKEND_WARMUP_ON_STARTUP: bool = True
     
     @property
     def MODEL_PATHS(self) -> Dict[str, str]:
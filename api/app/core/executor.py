@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a task is submitted while the wait queue is full."""
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound inference off the event loop.
+
+    "thread" dispatches into a thread pool (the model libraries release the
+    GIL for the heavy work), "process" into a process pool whose workers load
+    their own models through `initializer`, and "inline" calls the function
+    directly on the event loop. At most `max_concurrency` tasks run at once;
+    the rest wait, and submissions beyond `max_queue` waiting tasks are
+    rejected with ExecutorSaturated (0 means unbounded).
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_concurrency: int = 0,
+        max_queue: int = 0,
+        initializer: Optional[Callable] = None,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._initializer = initializer
+
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        elif kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer)
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.recycled = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"Inference queue is full ({self.queued} waiting)")
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        started = False
+        try:
+            async with self._get_semaphore():
+                with self._lock:
+                    self.queued -= 1
+                    self.running += 1
+                started = True
+                try:
+                    result = await self._dispatch(fn, *args)
+                finally:
+                    with self._lock:
+                        self.running -= 1
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            # Cancelled while still waiting for a slot
+            if not started:
+                with self._lock:
+                    self.queued -= 1
+
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def _dispatch(self, fn: Callable, *args: Any) -> Any:
+        if self._pool is None:
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            # Carry context variables (request id, client IP) into the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._pool, functools.partial(context.run, fn, *args))
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args))
+
+    def recycle_workers(self, initializer: Optional[Callable] = None) -> bool:
+        """
+        Replace the process pool so new workers load the current models.
+
+        Tasks already submitted finish on the old workers, which exit once
+        idle. Thread and inline mode share the app's ModelLoader and have
+        nothing to replace. Returns True if the pool was replaced.
+        """
+        if self.kind != "process":
+            return False
+        if initializer is not None:
+            self._initializer = initializer
+        old_pool = self._pool
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self._initializer)
+        old_pool.shutdown(wait=False)
+        with self._lock:
+            self.recycled += 1
+        return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "max_queue_depth": self.max_queue_depth,
+                "recycled": self.recycled,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        # Fallback for code paths that run without the app lifespan
+        _executor = InferenceExecutor(kind="inline")
+    return _executor
+
+
+def init_inference_executor(
+    kind: str,
+    max_workers: int,
+    max_concurrency: int = 0,
+    max_queue: int = 0,
+    initializer: Optional[Callable] = None,
+) -> InferenceExecutor:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+    _executor = InferenceExecutor(kind, max_workers, max_concurrency, max_queue, initializer)
+    logger.info(f"Inference executor started ({kind}, {max_workers} workers, concurrency {_executor.max_concurrency})")
+    return _executor
+
+
+def shutdown_inference_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -1,35 +1,107 @@
+import atexit
+import contextvars
 import logging
+import logging.handlers
+import queue
 import sys
+from typing import Optional, Tuple
 from app.core.config import settings
 
 
-class ClientIPFilter(logging.Filter):
-    def __init__(self):
-        super().__init__()
-        self.client_ip = "system"
-    
+# Set per request by the middleware in app.main; tasks and executor threads
+# that copy the context log under the request that started them
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+client_ip_var: contextvars.ContextVar[str] = contextvars.ContextVar("client_ip", default="system")
+
+
+class RequestContextFilter(logging.Filter):
     def filter(self, record):
-        record.client_ip = self.client_ip
+        record.request_id = request_id_var.get()
+        record.client_ip = client_ip_var.get()
         return True
 
 
-client_ip_filter = ClientIPFilter()
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() runs the full formatter in the calling thread;
+    # only the message is fixed here and the listener thread does the rest
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
-def setup_logging():
-    # Create handler with client_ip in format
+def bind_request_context(request_id: str, client_ip: str) -> Tuple[contextvars.Token, contextvars.Token]:
+    return request_id_var.set(request_id), client_ip_var.set(client_ip)
+
+
+def reset_request_context(tokens: Tuple[contextvars.Token, contextvars.Token]):
+    request_id_token, client_ip_token = tokens
+    request_id_var.reset(request_id_token)
+    client_ip_var.reset(client_ip_token)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def _stdout_handler() -> logging.Handler:
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(
-        logging.Formatter("%(asctime)s [%(levelname)s] [%(client_ip)s] %(name)s: %(message)s")
+        logging.Formatter("%(asctime)s [%(levelname)s] [%(client_ip)s] [%(request_id)s] %(name)s: %(message)s")
     )
-    handler.addFilter(client_ip_filter)
-    
+    return handler
+
+
+def setup_logging():
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    # Writing to stdout happens on the listener thread; callers only enqueue
+    handler = _stdout_handler()
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredFormatQueueHandler(log_queue)
+    # Context variables are read when the record is created, in the caller
+    _queue_handler.addFilter(RequestContextFilter())
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    root_logger.addHandler(_queue_handler)
+
+
+def setup_worker_logging():
+    """Log straight to stdout from an executor worker process.
+
+    A forked worker inherits the parent's queue handler but not its
+    listener thread, so records it queued would never be written.
+    """
+    global _listener, _queue_handler
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+    handler = _stdout_handler()
+    handler.addFilter(RequestContextFilter())
+    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
     root_logger.addHandler(handler)
 
 
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
+
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     return logger
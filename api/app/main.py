@@ -1,32 +1,103 @@
+import asyncio
+import functools
+import time
+import uuid
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from app.core.config import settings
-from app.core.logging import setup_logging, client_ip_filter
+from app.core import metrics
+from app.core.logging import setup_logging, get_logger, bind_request_context, reset_request_context
+from app.core.executor import init_inference_executor, shutdown_inference_executor, get_inference_executor
 from app.services.model_loader import ModelLoader
-from app.services.garment_classifier import init_garment_classifier
+from app.services.garment_classifier import init_garment_classifier, get_garment_classifier
+from app.services.file_handler import shutdown_file_io, get_output_store, UPLOAD_TEMP_DIR, OUTPUT_TEMP_DIR
+from app.services.janitor import init_janitor, shutdown_janitor, get_janitor
+from app.services.model_reloader import init_model_reloader, shutdown_model_reloader, get_model_reloader
+from app.services.tryon_backends import OOTDIFFUSION, VERTEX, init_backend_pools, shutdown_backend_pools, get_backend_stats, get_backend_states
+from app.services.tryon_jobs import init_job_queue, shutdown_job_queue, get_job_queue
+from app.services import inference_tasks
 from app.api import size_suggestion as size_routing
 from app.api import virtual_tryon as tryon_routing
 
 
 # Setup logging
 setup_logging()
+logger = get_logger(__name__)
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Time to produce the response head, per route", ["method", "route"]
+)
+REQUESTS = metrics.counter("http_requests", "Requests served, per route and status", ["method", "route", "status"])
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    startup_start = time.perf_counter()
     model_loader = ModelLoader()
-    model_loader.load_model()
+    load_classifier = functools.partial(
+        init_garment_classifier, settings.CLOTHING_CLASSIFIER_MODEL_PATH, fast_decode=settings.GARMENT_FAST_DECODE
+    )
+    if settings.STARTUP_PARALLEL_LOAD:
+        # Size models and the ONNX session build side by side, off the event loop
+        await asyncio.gather(
+            asyncio.to_thread(model_loader.load_model, parallel=True),
+            asyncio.to_thread(load_classifier),
+        )
+    else:
+        model_loader.load_model()
+        load_classifier()
     app.state.model_loader = model_loader
-
-    init_garment_classifier(settings.CLOTHING_CLASSIFIER_MODEL_PATH)
+    app.state.startup_timings = {"models": time.perf_counter() - startup_start}
+    
+    inference_tasks.bind_model_loader(model_loader)
+    init_inference_executor(
+        kind=settings.INFERENCE_EXECUTOR,
+        max_workers=settings.INFERENCE_WORKERS,
+        max_concurrency=settings.INFERENCE_MAX_CONCURRENCY,
+        max_queue=settings.INFERENCE_MAX_QUEUE,
+        initializer=inference_tasks.init_worker
+    )
+    
+    janitor = init_janitor(
+        folders=[UPLOAD_TEMP_DIR, OUTPUT_TEMP_DIR],
+        retention_seconds=settings.TEMP_RETENTION_HOURS * 3600,
+        quota_bytes=settings.TEMP_QUOTA_MB * 1024 * 1024,
+        interval_seconds=settings.JANITOR_INTERVAL_SECONDS,
+        rescan_seconds=settings.JANITOR_RESCAN_HOURS * 3600
+    )
+    # Backend downloads that never reached the output store (failed requests, extra samples)
+    janitor.add_sweeper(functools.partial(get_output_store().sweep_orphans, settings.BACKEND_ORPHAN_MAX_AGE_SECONDS))
+    await janitor.start()
+    
+    await init_model_reloader(model_loader, watch_seconds=settings.MODEL_RELOAD_WATCH_SECONDS).start()
+    
+    init_backend_pools(warmup=settings.BACKEND_WARMUP_ON_STARTUP)
+    init_job_queue(
+        concurrency={
+            OOTDIFFUSION: settings.TRYON_JOB_WORKERS_OOTDIFFUSION,
+            VERTEX: settings.TRYON_JOB_WORKERS_VERTEX,
+        },
+        max_queue=settings.TRYON_JOB_MAX_QUEUE,
+        retention_seconds=settings.TRYON_JOB_RETENTION_SECONDS
+    )
+    app.state.startup_timings["total"] = time.perf_counter() - startup_start
+    logger.info(
+        "Startup finished in %.2fs (models %.2fs)", app.state.startup_timings["total"], app.state.startup_timings["models"]
+    )
     yield
     # Shutdown
-    pass
+    await shutdown_model_reloader()
+    await shutdown_job_queue()
+    await shutdown_backend_pools()
+    await shutdown_janitor()
+    shutdown_inference_executor()
+    shutdown_file_io()
 
 
 app = FastAPI(
@@ -47,10 +118,37 @@ app.add_middleware(
 
 
 @app.middleware("http")
-async def add_client_ip(request: Request, call_next):
+async def add_request_context(request: Request, call_next):
     client_ip = request.client.host if request.client else "unknown"
-    client_ip_filter.client_ip = client_ip
+    # Keep the caller's id when a proxy or client already assigned one
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    tokens = bind_request_context(request_id, client_ip)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_context(tokens)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+def _route_template(scope) -> str:
+    # Routes of an included router keep their own path ("/"); FastAPI puts
+    # the template with the router's prefix on the scope it matched
+    route_context = scope.get("fastapi", {}).get("effective_route_context")
+    if route_context is not None:
+        return route_context.path_format
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
     response = await call_next(request)
+    # Label by route template, not the raw path, to keep the series bounded
+    route_path = _route_template(request.scope)
+    REQUEST_SECONDS.labels(request.method, route_path).observe(time.perf_counter() - start)
+    REQUESTS.labels(request.method, route_path, response.status_code).inc()
     return response
 
 output_dir = Path("temp/output")
@@ -65,6 +163,48 @@ async def root():
     }
     return messages
 
+@app.get("/stats")
+async def stats():
+    return {
+        "inference_executor": get_inference_executor().get_stats(),
+        "model_reloader": get_model_reloader().get_stats() if get_model_reloader() else None,
+        "garment_batcher": tryon_routing.get_garment_batcher().get_stats(),
+        "garment_cache": (await tryon_routing.get_garment_cache()).get_stats(),
+        "tryon_result_cache": tryon_routing.get_result_cache().get_stats(),
+        "tryon_coalescing": tryon_routing.TRYON_FLIGHTS.get_stats(),
+        "janitor": get_janitor().get_stats() if get_janitor() else None,
+        "output_store": get_output_store().get_stats(),
+        "tryon_jobs": get_job_queue().get_stats(),
+        "backends": get_backend_stats()
+    }
+
+@app.get("/ready")
+async def ready(request: Request):
+    """Which components are warm; 503 until the size models can serve /predict."""
+    model_loader = getattr(request.app.state, "model_loader", None)
+    classifier = get_garment_classifier()
+    size_models = {
+        model_type: model_loader is not None and model_loader.is_model_ready(model_type)
+        for model_type in settings.MODEL_PATHS
+    }
+    is_ready = model_loader is not None and model_loader.is_ready()
+    body = {
+        "ready": is_ready,
+        "model_version": model_loader.model_version if model_loader is not None else None,
+        "components": {
+            "size_models": size_models,
+            "garment_classifier": classifier is not None and classifier.is_ready(),
+            # Cold backends connect on their first try-on request
+            "backends": get_backend_states(),
+        },
+        "startup_seconds": getattr(request.app.state, "startup_timings", None),
+    }
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 # Include routers
 app.include_router(size_routing.router, prefix="/api/size-suggestion", tags=["Size Suggestion"])
 app.include_router(tryon_routing.router, prefix="/api/virtual-tryon", tags=["Virtual Try-On"])
@@ -35,3 +35,18 @@ class PredictResponse(BaseModel):
     alternatives: List[Alternative]
     model_version: str
     alternatives_note: Optional[str] = None
+
+
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest] = Field(..., min_length=1, description="Rows to score, in order")
+
+
+class BatchPredictResponse(BaseModel):
+    predictions: List[PredictResponse]
+
+
+class ModelReloadRequest(BaseModel):
+    model_version: Optional[str] = Field(
+        default=None,
+        description="Version label for the new model set; keeps the current one if omitted"
+    )
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Dict, Optional
 from pydantic import BaseModel, Field
 
 
@@ -15,3 +16,24 @@ class VirtualTryOnResponse(BaseModel):
     message: str = Field(..., description="Status message")
     category: str = Field(..., description="Category of the try-on (HD, DC, Gemini or garment type)")
     processing_time: float = Field(..., description="Time taken to process the request in seconds")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each stage of the request")
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a queued try-on job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class TryOnJobResponse(BaseModel):
+    """Status of a try-on job submitted through the /jobs endpoints."""
+    job_id: str = Field(..., description="Identifier to poll with")
+    mode: str = Field(..., description="Try-on mode the job runs (hd, dc or gemini)")
+    status: JobStatus = Field(..., description="Current job status")
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    started_at: Optional[float] = Field(None, description="Time a worker picked the job up")
+    finished_at: Optional[float] = Field(None, description="Time the job finished or failed")
+    result: Optional[VirtualTryOnResponse] = Field(None, description="Try-on result once the job is done")
+    error: Optional[str] = Field(None, description="Failure reason if the job failed")
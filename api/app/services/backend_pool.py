@@ -0,0 +1,176 @@
+import asyncio
+import contextvars
+import functools
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+from fastapi import HTTPException
+from app.core import metrics
+from app.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+CALL_SECONDS = metrics.histogram(
+    "tryon_backend_call_seconds", "Duration of remote try-on calls, failed ones included", ["backend"]
+)
+CALL_ERRORS = metrics.counter("tryon_backend_errors", "Remote try-on calls that raised", ["backend"])
+CALL_REJECTIONS = metrics.counter("tryon_backend_rejections", "Calls turned away with BackendBusy", ["backend"])
+
+
+class BackendBusy(RuntimeError):
+    """Raised when a backend already has max_waiting calls waiting for a slot."""
+
+
+class BackendClientPool:
+    """
+    Shared clients for one remote try-on backend.
+
+    `size` clients are created once, off the event loop, and handed out
+    round-robin (both gradio_client and google-genai clients can serve
+    concurrent calls). Calls run on the pool's own thread pool, so a slow
+    backend only ties up its own threads, and at most `max_in_flight` run at
+    once; callers beyond that wait, and more than `max_waiting` waiting
+    callers are rejected with BackendBusy (0 means unbounded).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        size: int = 1,
+        max_in_flight: int = 1,
+        max_waiting: int = 0,
+    ):
+        self.name = name
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_waiting = max_waiting
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix=f"backend-{name}")
+        self._clients: Optional[List[Any]] = None
+        self._next_client = itertools.count()
+        self._init_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._warmup: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self._call_seconds = CALL_SECONDS.labels(name)
+        self._call_errors = CALL_ERRORS.labels(name)
+        self._call_rejections = CALL_REJECTIONS.labels(name)
+
+    @property
+    def ready(self) -> bool:
+        return self._clients is not None
+
+    @property
+    def state(self) -> str:
+        """"warm" once the clients exist, "warming" while they are being created, else "cold"."""
+        if self._clients is not None:
+            return "warm"
+        if self._warmup is not None and not self._warmup.done():
+            return "warming"
+        return "cold"
+
+    async def _ensure_clients(self) -> List[Any]:
+        if self._clients is not None:
+            return self._clients
+        async with self._init_lock:
+            if self._clients is None:
+                loop = asyncio.get_running_loop()
+                try:
+                    self._clients = [
+                        await loop.run_in_executor(self._executor, self.factory)
+                        for _ in range(self.size)
+                    ]
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to initialize {self.name} client: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"Failed to connect to {self.name} service")
+                logger.info(f"{self.name} client pool ready ({self.size} clients, {self.max_in_flight} in flight)")
+        return self._clients
+
+    def _start_warmup(self) -> asyncio.Task:
+        # One creation attempt at a time; a failed attempt is retried by the next caller
+        if self._warmup is None or (self._warmup.done() and self._clients is None):
+            self._warmup = asyncio.create_task(self._ensure_clients())
+            self._warmup.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._warmup
+
+    def start(self):
+        """Create the clients in the background; a failure is retried on first use."""
+        self._start_warmup()
+
+    async def wait_warm(self):
+        """Wait for the background client creation started by start() to settle."""
+        if self._warmup is not None:
+            await asyncio.wait([self._warmup])
+
+    async def call(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run fn(client, *args, **kwargs) on one of the pool's clients."""
+        with self._lock:
+            if self.max_waiting and self.waiting >= self.max_waiting:
+                self.rejected += 1
+                self._call_rejections.inc()
+                raise BackendBusy(f"{self.name} has {self.waiting} calls waiting")
+            self.waiting += 1
+
+        started = False
+        try:
+            async with self._semaphore:
+                with self._lock:
+                    self.waiting -= 1
+                    self.in_flight += 1
+                started = True
+                call_start = time.perf_counter()
+                try:
+                    clients = await self._ensure_clients()
+                    client = clients[next(self._next_client) % len(clients)]
+                    loop = asyncio.get_running_loop()
+                    context = contextvars.copy_context()
+                    return await loop.run_in_executor(
+                        self._executor, functools.partial(context.run, fn, client, *args, **kwargs)
+                    )
+                except Exception:
+                    with self._lock:
+                        self.failures += 1
+                    self._call_errors.inc()
+                    raise
+                finally:
+                    self._call_seconds.observe(time.perf_counter() - call_start)
+                    with self._lock:
+                        self.in_flight -= 1
+                        self.calls += 1
+        finally:
+            # Cancelled while still waiting for a slot
+            if not started:
+                with self._lock:
+                    self.waiting -= 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "state": self.state,
+                "clients": self.size,
+                "max_in_flight": self.max_in_flight,
+                "max_waiting": self.max_waiting,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+    async def shutdown(self):
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,262 @@
+"""
+Array-backed runtimes for the size-suggestion models.
+
+export_estimator flattens a fitted scikit-learn DecisionTreeClassifier,
+MLPClassifier or StandardScaler into plain NumPy arrays saved as a .npz file.
+The Compiled* classes rebuild inference from those arrays with vectorized
+NumPy only, so serving from .npz artifacts never imports scikit-learn.
+"""
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+
+COMPILED_SUFFIX = ".npz"
+
+# scikit-learn marks leaves with children_left == children_right == -1
+_TREE_LEAF = -1
+
+
+class CompiledDecisionTree:
+    def __init__(
+        self,
+        classes: np.ndarray,
+        children_left: np.ndarray,
+        children_right: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        proba: np.ndarray,
+        max_depth: int,
+    ):
+        self.classes_ = classes
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.proba = proba
+        self.max_depth = int(max_depth)
+
+    def _apply(self, X: np.ndarray) -> np.ndarray:
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        nodes = np.zeros(X.shape[0], dtype=np.intp)
+
+        # Walk every row down one level per step until all reach a leaf
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            internal = left != _TREE_LEAF
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.children_right[nodes]), nodes)
+
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.proba[self._apply(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class CompiledMLP:
+    def __init__(
+        self,
+        classes: np.ndarray,
+        coefs: List[np.ndarray],
+        intercepts: List[np.ndarray],
+        activation: str,
+        out_activation: str,
+    ):
+        if activation not in _HIDDEN_ACTIVATIONS:
+            raise ValueError(f"Unsupported hidden activation: {activation}")
+        if out_activation not in ("softmax", "logistic"):
+            raise ValueError(f"Unsupported output activation: {out_activation}")
+
+        self.classes_ = classes
+        self.coefs = coefs
+        self.intercepts = intercepts
+        self.activation = activation
+        self.out_activation = out_activation
+
+    def _forward(self, X: np.ndarray) -> np.ndarray:
+        # Mirrors MLPClassifier._forward_pass_fast, including in-place updates
+        activation = np.asarray(X, dtype=np.float64)
+        hidden_activation = _HIDDEN_ACTIVATIONS[self.activation]
+        last_layer = len(self.coefs) - 1
+
+        for i, (coef, intercept) in enumerate(zip(self.coefs, self.intercepts)):
+            activation = activation @ coef
+            activation += intercept
+            if i != last_layer:
+                hidden_activation(activation)
+
+        if self.out_activation == "softmax":
+            tmp = activation - activation.max(axis=1)[:, np.newaxis]
+            np.exp(tmp, out=activation)
+            activation /= activation.sum(axis=1)[:, np.newaxis]
+        else:
+            _logistic(activation)
+
+        return activation
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        y_pred = self._forward(X)
+        if y_pred.shape[1] == 1:
+            y_pred = y_pred.ravel()
+            return np.vstack([1 - y_pred, y_pred]).T
+        return y_pred
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        y_pred = self._forward(X)
+        if y_pred.shape[1] == 1:
+            return self.classes_.take((y_pred.ravel() > 0.5).astype(np.intp))
+        return self.classes_.take(np.argmax(y_pred, axis=1))
+
+
+class CompiledStandardScaler:
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+def _relu(x: np.ndarray) -> None:
+    np.maximum(x, 0, out=x)
+
+
+def _tanh(x: np.ndarray) -> None:
+    np.tanh(x, out=x)
+
+
+def _logistic(x: np.ndarray) -> None:
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1
+    np.reciprocal(x, out=x)
+
+
+def _identity(x: np.ndarray) -> None:
+    pass
+
+
+_HIDDEN_ACTIVATIONS = {
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+    "identity": _identity,
+}
+
+
+def _export_tree(estimator) -> Dict[str, np.ndarray]:
+    tree = estimator.tree_
+    if tree.n_outputs != 1:
+        raise ValueError("Only single-output decision trees can be compiled")
+
+    # Recent scikit-learn stores leaf class fractions directly; older
+    # releases store weighted counts and normalize inside predict_proba
+    proba = tree.value[:, 0, :estimator.n_classes_].astype(np.float64)
+    if not np.allclose(proba.sum(axis=1), 1.0):
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+
+    # Leaves carry a sentinel feature index; point them at column 0 so
+    # gathers stay in bounds (their comparison result is never used)
+    feature = tree.feature.astype(np.intp)
+    feature[tree.children_left == _TREE_LEAF] = 0
+
+    return {
+        "kind": np.array("decision_tree"),
+        "classes": np.asarray(estimator.classes_),
+        "children_left": tree.children_left.astype(np.intp),
+        "children_right": tree.children_right.astype(np.intp),
+        "feature": feature,
+        "threshold": tree.threshold.astype(np.float64),
+        "proba": proba,
+        "max_depth": np.array(tree.max_depth),
+    }
+
+
+def _export_mlp(estimator) -> Dict[str, np.ndarray]:
+    arrays = {
+        "kind": np.array("mlp"),
+        "classes": np.asarray(estimator.classes_),
+        "activation": np.array(estimator.activation),
+        "out_activation": np.array(estimator.out_activation_),
+        "n_layers": np.array(len(estimator.coefs_)),
+    }
+    for i, (coef, intercept) in enumerate(zip(estimator.coefs_, estimator.intercepts_)):
+        arrays[f"coef_{i}"] = np.ascontiguousarray(coef)
+        arrays[f"intercept_{i}"] = np.ascontiguousarray(intercept)
+    return arrays
+
+
+def _export_scaler(estimator) -> Dict[str, np.ndarray]:
+    return {
+        "kind": np.array("standard_scaler"),
+        "mean": np.asarray(estimator.mean_, dtype=np.float64),
+        "scale": np.asarray(estimator.scale_, dtype=np.float64),
+    }
+
+
+def export_estimator(estimator: Any, output_path: Union[str, Path]) -> Path:
+    """Flatten a fitted estimator into a .npz file and return its path."""
+    if hasattr(estimator, "tree_"):
+        arrays = _export_tree(estimator)
+    elif hasattr(estimator, "coefs_"):
+        arrays = _export_mlp(estimator)
+    elif hasattr(estimator, "mean_") and hasattr(estimator, "scale_"):
+        arrays = _export_scaler(estimator)
+    else:
+        raise TypeError(f"Cannot compile estimator of type {type(estimator).__name__}")
+
+    output_path = Path(output_path).with_suffix(COMPILED_SUFFIX)
+    np.savez(output_path, **arrays)
+    return output_path
+
+
+def load_compiled(path: Union[str, Path]):
+    with np.load(path, allow_pickle=False) as data:
+        kind = str(data["kind"])
+
+        if kind == "decision_tree":
+            return CompiledDecisionTree(
+                classes=data["classes"],
+                children_left=data["children_left"],
+                children_right=data["children_right"],
+                feature=data["feature"],
+                threshold=data["threshold"],
+                proba=data["proba"],
+                max_depth=int(data["max_depth"]),
+            )
+
+        if kind == "mlp":
+            n_layers = int(data["n_layers"])
+            return CompiledMLP(
+                classes=data["classes"],
+                coefs=[data[f"coef_{i}"] for i in range(n_layers)],
+                intercepts=[data[f"intercept_{i}"] for i in range(n_layers)],
+                activation=str(data["activation"]),
+                out_activation=str(data["out_activation"]),
+            )
+
+        if kind == "standard_scaler":
+            return CompiledStandardScaler(mean=data["mean"], scale=data["scale"])
+
+    raise ValueError(f"Unknown compiled model kind '{kind}' in {path}")
+
+
+def load_artifact(path: Union[str, Path]):
+    """Load a compiled .npz artifact, or fall back to unpickling with joblib."""
+    if Path(path).suffix == COMPILED_SUFFIX:
+        return load_compiled(path)
+
+    import joblib
+    return joblib.load(path)
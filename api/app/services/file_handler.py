@@ -1,9 +1,17 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
 import logging
-import time
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional
 from uuid import uuid4
 from fastapi import UploadFile, HTTPException
+from app.core.config import settings
+from app.services.janitor import track_temp_file
+from app.services.output_store import OutputStore
 
 logger = logging.getLogger(__name__)
 
@@ -11,32 +19,68 @@ logger = logging.getLogger(__name__)
 BASE_TEMP_DIR = Path("temp")
 UPLOAD_TEMP_DIR = BASE_TEMP_DIR / "upload"
 OUTPUT_TEMP_DIR = BASE_TEMP_DIR / "output"
+# gradio_client downloads results here; on the same filesystem as the output folder
+GRADIO_DOWNLOAD_DIR = BASE_TEMP_DIR / "gradio"
 
 # Allowed file extensions and max file size
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    """An upload streamed to disk, shared by the garment check and the try-on backends."""
+    path: Path
+    size: int
+    digest: str
+
+
+def content_hasher():
+    # Fast, non-cryptographic use: keys caches by image content
+    return hashlib.blake2b(digest_size=16)
+
+
+# Disk I/O runs on its own small pool so a slow disk never stalls the event
+# loop or competes with inference for workers; FILE_IO_WORKERS=0 runs it inline
+_file_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_file_io_executor() -> Optional[ThreadPoolExecutor]:
+    global _file_io_executor
+    if _file_io_executor is None and settings.FILE_IO_WORKERS > 0:
+        _file_io_executor = ThreadPoolExecutor(max_workers=settings.FILE_IO_WORKERS, thread_name_prefix="file-io")
+    return _file_io_executor
+
+
+async def run_file_io(fn: Callable, *args: Any) -> Any:
+    executor = _get_file_io_executor()
+    if executor is None:
+        return fn(*args)
+    # Keep the request context for log lines written from the pool
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, fn, *args))
+
+
+def shutdown_file_io():
+    global _file_io_executor
+    if _file_io_executor is not None:
+        _file_io_executor.shutdown(wait=True)
+        _file_io_executor = None
 
 
 def setup_temp_folders():
     UPLOAD_TEMP_DIR.mkdir(parents=True, exist_ok=True)
     OUTPUT_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    GRADIO_DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
     logger.info(f"Temp folders initialized: {UPLOAD_TEMP_DIR}, {OUTPUT_TEMP_DIR}")
 
 
-def cleanup_old_files(folder: Path, max_age_hours: int = 24):
-    if not folder.exists():
-        return
-    
-    current_time = time.time()
-    for file_path in folder.glob("*"):
-        if file_path.is_file():
-            file_age = current_time - file_path.stat().st_mtime
-            if file_age > (max_age_hours * 3600):
-                try:
-                    file_path.unlink()
-                    logger.debug(f"Cleaned up old file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete old file {file_path}: {str(e)}")
+_output_store = OutputStore(OUTPUT_TEMP_DIR, source_roots=[GRADIO_DOWNLOAD_DIR])
+
+
+def get_output_store() -> OutputStore:
+    return _output_store
 
 
 def validate_image_file(file: UploadFile) -> None:
@@ -56,52 +100,83 @@ def validate_image_file(file: UploadFile) -> None:
         )
 
 
-async def save_upload_file(upload_file: UploadFile, prefix: str = "img") -> Path:
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+
+async def stream_upload_file(upload_file: UploadFile, prefix: str = "img") -> SavedUpload:
     validate_image_file(upload_file)
     
+    # Reject early when the client declared the size up front
+    if upload_file.size is not None and upload_file.size > MAX_FILE_SIZE:
+        raise _file_too_large()
+    
     # Generate unique filename
     file_ext = Path(upload_file.filename).suffix.lower()
     unique_filename = f"{prefix}_{uuid4().hex}{file_ext}"
     file_path = UPLOAD_TEMP_DIR / unique_filename
     
-    # Read and validate file size
-    content = await upload_file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
+    size, digest = await run_file_io(_write_upload, upload_file.file, file_path)
     
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(content)
+    logger.info("Saved upload file: %s (%d bytes)", file_path, size)
+    return SavedUpload(path=file_path, size=size, digest=digest)
+
+
+def _write_upload(source: BinaryIO, file_path: Path) -> tuple[int, str]:
+    # Copy in chunks, hashing as we go, and stop as soon as the limit is passed
+    hasher = content_hasher()
+    size = 0
+    try:
+        with open(file_path, "wb") as f:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    return size, hasher.hexdigest()
+
+
+async def save_result_image(source_path: str, prefix: str = "result") -> Path:
+    # Move (or, across filesystems, copy) the backend result into the output folder
+    output_path = await run_file_io(_output_store.store, source_path, prefix)
+    logger.info("Saved result image: %s", output_path)
     
-    logger.info(f"Saved upload file: {file_path} ({len(content)} bytes)")
-    return file_path
+    return output_path
 
 
-def save_result_image(source_path: str, prefix: str = "result") -> Path:
-    if not Path(source_path).exists():
-        raise FileNotFoundError(f"Result image not found: {source_path}")
-    
-    # Generate unique filename for output
-    file_ext = Path(source_path).suffix
+async def save_generated_image(image, prefix: str = "result", file_ext: str = ".jpeg") -> Path:
+    """Write an image object that has a `save(path)` method (e.g. a google-genai Image)."""
     unique_filename = f"{prefix}_{uuid4().hex}{file_ext}"
     output_path = OUTPUT_TEMP_DIR / unique_filename
     
-    # Copy result to output folder
-    shutil.copy2(source_path, output_path)
-    logger.info(f"Saved result image: {output_path}")
+    await run_file_io(_save_generated, image, output_path)
+    logger.info("Saved result image: %s", output_path)
     
     return output_path
 
 
-def cleanup_files(*file_paths: Path):
+def _save_generated(image, output_path: Path):
+    image.save(str(output_path))
+    track_temp_file(output_path)
+
+
+async def cleanup_files(*file_paths: Path):
+    await run_file_io(_delete_files, file_paths)
+
+
+def _delete_files(file_paths: tuple[Path, ...]):
     for file_path in file_paths:
         try:
             if file_path and file_path.exists():
                 file_path.unlink()
-                logger.debug(f"Cleaned up temp file: {file_path}")
+                logger.debug("Cleaned up temp file: %s", file_path)
         except Exception as e:
             logger.warning(f"Failed to cleanup file {file_path}: {str(e)}")
 
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from app.core.logging import get_logger
+from app.services.cache import LRUCache
+
+
+logger = get_logger(__name__)
+
+# (restricted, class_name, confidence), as returned by GarmentClassifier.is_restricted
+Verdict = Tuple[bool, str, float]
+
+
+class GarmentVerdictCache(LRUCache):
+    """
+    Classification verdicts keyed by the content digest of the garment upload.
+
+    The in-memory LRU is bounded by `max_entries`. With `db_path` set,
+    verdicts are also written through to SQLite and read back on a memory
+    miss, so they survive restarts; rows from other classifier models
+    (different `model_id`) are never returned, and the table is pruned to the
+    newest `disk_max_entries` rows when opened.
+    """
+
+    def __init__(self, max_entries: int, model_id: str, db_path: str = "", disk_max_entries: int = 100000):
+        super().__init__(max_entries)
+        self.model_id = model_id
+        self.set_generation(model_id)
+        self.disk_hits = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        if db_path and self.enabled:
+            try:
+                self._open_db(Path(db_path), disk_max_entries)
+            except Exception as e:
+                logger.error(f"Garment cache persistence disabled, could not open {db_path}: {e}")
+                self._db = None
+
+    def _open_db(self, db_path: Path, disk_max_entries: int):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                model_id TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                restricted INTEGER NOT NULL,
+                class_name TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model_id, digest)
+            )
+            """
+        )
+        self._db.execute("DELETE FROM verdicts WHERE model_id != ?", (self.model_id,))
+        self._db.execute(
+            "DELETE FROM verdicts WHERE rowid NOT IN "
+            "(SELECT rowid FROM verdicts ORDER BY created_at DESC LIMIT ?)",
+            (disk_max_entries,)
+        )
+        count = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        logger.info(f"Garment verdict cache persisted at {db_path} ({count} stored verdicts)")
+
+    def close(self):
+        """Close the SQLite connection; later lookups and writes stay in memory."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_verdict(self, digest: str) -> Optional[Verdict]:
+        verdict = self.get(digest)
+        if verdict is not None or self._db is None:
+            return verdict
+
+        with self._db_lock:
+            # Closed since the check above
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT restricted, class_name, confidence FROM verdicts WHERE model_id = ? AND digest = ?",
+                (self.model_id, digest)
+            ).fetchone()
+        if row is None:
+            return None
+
+        verdict = (bool(row[0]), row[1], row[2])
+        with self._lock:
+            self.disk_hits += 1
+        super().put(digest, verdict)
+        return verdict
+
+    def put_verdict(self, digest: str, verdict: Verdict):
+        self.put(digest, verdict)
+        if self._db is None:
+            return
+
+        restricted, class_name, confidence = verdict
+        try:
+            with self._db_lock:
+                if self._db is None:
+                    return
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.model_id, digest, int(restricted), class_name, float(confidence), time.time())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist garment verdict: {e}")
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        lookups = stats["hits"] + stats["misses"]
+        with self._lock:
+            stats["disk_hits"] = self.disk_hits
+            stats["persistent"] = self._db is not None
+            # A disk hit is recorded as a memory miss, so count it back as a hit overall
+            stats["overall_hit_rate"] = (stats["hits"] + self.disk_hits) / lookups if lookups else 0.0
+        return stats
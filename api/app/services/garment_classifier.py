@@ -1,7 +1,10 @@
+import threading
 import numpy as np
+from time import perf_counter
 from pathlib import Path
 from PIL import Image
 from io import BytesIO
+from app.core import metrics
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -22,14 +25,33 @@ CLASS_NAMES = [
 
 RESTRICTED_CLASSES = {"bikini", "bra", "underwear"}
 
+INPUT_SIZE = 224
+
+# Encoded image bytes, or the path of a saved upload
+ImageSource = bytes | str | Path
+
 _MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
 _STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
+# (x / 255 - mean) / std folded into one multiply-add per channel, CHW-broadcastable
+_SCALE = (1.0 / (255.0 * _STD)).astype(np.float32)[:, None, None]
+_OFFSET = (-_MEAN / _STD).astype(np.float32)[:, None, None]
+
+STAGE_SECONDS = metrics.histogram(
+    "garment_classifier_stage_seconds", "Time per classifier call spent decoding images and running the model", ["stage"]
+)
+_DECODE_SECONDS = STAGE_SECONDS.labels("decode")
+_INFER_SECONDS = STAGE_SECONDS.labels("infer")
+
 
 class GarmentClassifier:
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, fast_decode: bool = True):
         self._session = None
         self._model_path = model_path
+        self._fast_decode = fast_decode
+        self.model_id = ""
+        # Input tensors are reused per thread; the session copies them on run()
+        self._buffers = threading.local()
 
     def load(self) -> bool:
         try:
@@ -42,6 +64,10 @@ class GarmentClassifier:
                 str(path),
                 providers=["CPUExecutionProvider"],
             )
+            # Identifies this exact model file and decode mode for cached verdicts
+            stat = path.stat()
+            decode = "draft" if self._fast_decode else "full"
+            self.model_id = f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}:{decode}"
             logger.info(f"Garment classifier loaded from {path}")
             return True
         except Exception as e:
@@ -51,20 +77,49 @@ class GarmentClassifier:
     def is_ready(self) -> bool:
         return self._session is not None
 
-    def _preprocess(self, image_bytes: bytes) -> np.ndarray:
-        img = Image.open(BytesIO(image_bytes)).convert("RGB")
-        img = img.resize((224, 224), Image.BILINEAR)
-        x = np.array(img, dtype=np.float32) / 255.0
-        x = (x - _MEAN) / _STD
-        x = x.transpose(2, 0, 1)
-        x = np.expand_dims(x, axis=0)
+    def supports_batching(self) -> bool:
+        # A fixed leading dimension means the exported graph only takes batches of that size
+        batch_dim = self._session.get_inputs()[0].shape[0]
+        return not isinstance(batch_dim, int)
+
+    def _load_image(self, image: ImageSource) -> Image.Image:
+        img = Image.open(BytesIO(image) if isinstance(image, bytes) else image)
+        if self._fast_decode:
+            # JPEG only: let libjpeg decode at the smallest 1/2, 1/4 or 1/8
+            # scale that still covers the model input
+            img.draft("RGB", (INPUT_SIZE, INPUT_SIZE))
+        return img.convert("RGB").resize((INPUT_SIZE, INPUT_SIZE), Image.BILINEAR)
+
+    @staticmethod
+    def _normalize_into(img: Image.Image, out: np.ndarray) -> None:
+        # HWC uint8 -> normalized CHW float32 written straight into `out`
+        pixels = np.asarray(img).transpose(2, 0, 1)
+        np.multiply(pixels, _SCALE, out=out)
+        out += _OFFSET
+
+    def _input_buffer(self, batch_size: int) -> np.ndarray:
+        buffer = getattr(self._buffers, "array", None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = np.empty((batch_size, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+            self._buffers.array = buffer
+        return buffer[:batch_size]
+
+    def _preprocess_batch(self, images: list[ImageSource]) -> np.ndarray:
+        x = self._input_buffer(len(images))
+        for row, image in enumerate(images):
+            self._normalize_into(self._load_image(image), x[row])
         return x
 
-    def classify(self, image_bytes: bytes) -> tuple[str, float]:
+    def _preprocess(self, image: ImageSource) -> np.ndarray:
+        return self._preprocess_batch([image])
+
+    def classify(self, image: ImageSource) -> tuple[str, float]:
         if not self.is_ready():
             raise RuntimeError("Garment classifier is not loaded")
 
-        x = self._preprocess(image_bytes)
+        start = perf_counter()
+        x = self._preprocess(image)
+        decoded = perf_counter()
         input_name = self._session.get_inputs()[0].name
         outputs = self._session.run(None, {input_name: x})
         logits = outputs[0][0]
@@ -73,12 +128,40 @@ class GarmentClassifier:
         probs = exp_logits / exp_logits.sum()
 
         idx = int(np.argmax(probs))
+        _DECODE_SECONDS.observe(decoded - start)
+        _INFER_SECONDS.observe(perf_counter() - decoded)
         return CLASS_NAMES[idx], float(probs[idx])
 
-    def is_restricted(self, image_bytes: bytes) -> tuple[bool, str, float]:
-        class_name, confidence = self.classify(image_bytes)
+    def classify_batch(self, images: list[ImageSource]) -> list[tuple[str, float]]:
+        if not self.is_ready():
+            raise RuntimeError("Garment classifier is not loaded")
+        if not self.supports_batching():
+            return [self.classify(image) for image in images]
+
+        start = perf_counter()
+        x = self._preprocess_batch(images)
+        decoded = perf_counter()
+        input_name = self._session.get_inputs()[0].name
+        logits = self._session.run(None, {input_name: x})[0]
+
+        exp_logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp_logits / exp_logits.sum(axis=1, keepdims=True)
+
+        indices = np.argmax(probs, axis=1)
+        _DECODE_SECONDS.observe(decoded - start)
+        _INFER_SECONDS.observe(perf_counter() - decoded)
+        return [(CLASS_NAMES[idx], float(probs[row, idx])) for row, idx in enumerate(indices)]
+
+    def is_restricted(self, image: ImageSource) -> tuple[bool, str, float]:
+        class_name, confidence = self.classify(image)
         return class_name in RESTRICTED_CLASSES, class_name, confidence
 
+    def is_restricted_batch(self, images: list[ImageSource]) -> list[tuple[bool, str, float]]:
+        return [
+            (class_name in RESTRICTED_CLASSES, class_name, confidence)
+            for class_name, confidence in self.classify_batch(images)
+        ]
+
 
 _classifier: GarmentClassifier | None = None
 
@@ -86,7 +169,7 @@ def get_garment_classifier() -> GarmentClassifier | None:
     return _classifier
 
 
-def init_garment_classifier(model_path: str) -> bool:
+def init_garment_classifier(model_path: str, fast_decode: bool = True) -> bool:
     global _classifier
-    _classifier = GarmentClassifier(model_path)
+    _classifier = GarmentClassifier(model_path, fast_decode=fast_decode)
     return _classifier.load()
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+from PIL import Image, ImageOps
+
+
+EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """How a backend wants its input images: fit inside max_size (width, height), as JPEG."""
+    max_size: Tuple[int, int]
+    quality: int = 90
+
+
+def normalize_image(path: Path, profile: ImageProfile) -> Tuple[Path, int, int]:
+    """
+    Rewrite an uploaded image for a backend: apply the EXIF orientation,
+    shrink it to fit the profile and re-encode it as JPEG next to the original.
+
+    Returns (path, bytes_before, bytes_after). The original file is replaced
+    only when something changed; images that already fit, need no rotation
+    and are JPEG, or that carry transparency, are left as they are.
+    """
+    before = path.stat().st_size
+    with Image.open(path) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        # Orientations 5-8 swap width and height
+        box = profile.max_size if orientation < 5 else profile.max_size[::-1]
+        fits = img.width <= box[0] and img.height <= box[1]
+        transparent = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        if transparent or (fits and orientation == 1 and img.format == "JPEG"):
+            return path, before, before
+
+        # JPEG only: decode at the smallest 1/2, 1/4 or 1/8 scale still covering the box
+        img.draft("RGB", box)
+        out = ImageOps.exif_transpose(img).convert("RGB")
+    out.thumbnail(profile.max_size, Image.LANCZOS)
+
+    out_path = path.with_name(f"{path.stem}_norm.jpg")
+    out.save(out_path, "JPEG", quality=profile.quality, optimize=True)
+    after = out_path.stat().st_size
+    if fits and orientation == 1 and after >= before:
+        # Plain re-encode that did not pay off
+        out_path.unlink()
+        return path, before, before
+
+    path.unlink()
+    return out_path, before, after
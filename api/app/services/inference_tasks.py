@@ -0,0 +1,43 @@
+"""
+Picklable entry points for work dispatched through the InferenceExecutor.
+
+In thread and inline mode they use the app's own ModelLoader (bound at
+startup) and garment classifier. In process mode each worker process runs
+init_worker once to load its own copies.
+"""
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger, setup_worker_logging
+from app.schemas.size_suggestion import PredictRequest, PredictResponse
+from app.services.garment_classifier import ImageSource, get_garment_classifier, init_garment_classifier
+from app.services.model_loader import ModelLoader
+
+
+logger = get_logger(__name__)
+
+_model_loader: Optional[ModelLoader] = None
+
+
+def bind_model_loader(model_loader: ModelLoader):
+    global _model_loader
+    _model_loader = model_loader
+
+
+def init_worker(model_version: Optional[str] = None):
+    setup_worker_logging()
+    model_loader = ModelLoader(model_version)
+    model_loader.load_model()
+    bind_model_loader(model_loader)
+    init_garment_classifier(settings.CLOTHING_CLASSIFIER_MODEL_PATH, fast_decode=settings.GARMENT_FAST_DECODE)
+
+
+def predict_size(model_type: str, request: PredictRequest) -> PredictResponse:
+    return _model_loader.get_predictor(model_type).predict(request)
+
+
+def predict_size_batch(model_type: str, requests: List[PredictRequest]) -> List[PredictResponse]:
+    return _model_loader.get_predictor(model_type).predict_batch(requests)
+
+
+def classify_garments(images: List[ImageSource]) -> List[Tuple[bool, str, float]]:
+    return get_garment_classifier().is_restricted_batch(images)
@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class TempFileJanitor:
+    """
+    Expires files in the temp folders from a background task.
+
+    Files are indexed in a heap ordered by expiry time, so each sweep only
+    touches the files that are due instead of listing the folders. The index
+    is seeded by one scan at startup (and an occasional rescan, for files
+    written by other worker processes); files this process writes are added
+    with track(). When a quota is set, the oldest files are also removed
+    until the tracked total fits under it. Callables registered with
+    add_sweeper() run after every sweep.
+    """
+
+    def __init__(
+        self,
+        folders: List[Path],
+        retention_seconds: float,
+        quota_bytes: int = 0,
+        interval_seconds: float = 60,
+        rescan_seconds: float = 0,
+    ):
+        self.folders = folders
+        self.retention_seconds = retention_seconds
+        self.quota_bytes = quota_bytes
+        self.interval_seconds = interval_seconds
+        self.rescan_seconds = rescan_seconds
+        self._heap: List[Tuple[float, str]] = []
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_scan = 0.0
+        self._sweepers: List[Callable[[], None]] = []
+
+        self.expired = 0
+        self.evicted = 0
+        self.sweeps = 0
+        self.last_sweep_ms = 0.0
+
+    def track(self, path: Path, size: Optional[int] = None, created_at: Optional[float] = None):
+        key = str(path)
+        if size is None or created_at is None:
+            try:
+                stat = os.stat(key)
+            except FileNotFoundError:
+                return
+            size = stat.st_size if size is None else size
+            created_at = stat.st_mtime if created_at is None else created_at
+
+        with self._lock:
+            if key in self._sizes:
+                return
+            self._sizes[key] = size
+            self._total_bytes += size
+            heapq.heappush(self._heap, (created_at + self.retention_seconds, key))
+
+    def add_sweeper(self, sweeper: Callable[[], None]):
+        self._sweepers.append(sweeper)
+
+    def scan(self):
+        """Index every file currently in the temp folders."""
+        for folder in self.folders:
+            if not folder.exists():
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        self.track(Path(entry.path), stat.st_size, stat.st_mtime)
+        self._last_scan = time.monotonic()
+
+    def _pop_due(self, now: float) -> List[Tuple[str, int, bool]]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, key = heapq.heappop(self._heap)
+                due.append((key, self._sizes.pop(key), False))
+            if self.quota_bytes:
+                total = self._total_bytes - sum(size for _, size, _ in due)
+                while self._heap and total > self.quota_bytes:
+                    _, key = heapq.heappop(self._heap)
+                    size = self._sizes.pop(key)
+                    total -= size
+                    due.append((key, size, True))
+            self._total_bytes -= sum(size for _, size, _ in due)
+        return due
+
+    def sweep(self):
+        start = time.perf_counter()
+        if self.rescan_seconds and time.monotonic() - self._last_scan >= self.rescan_seconds:
+            self.scan()
+
+        due = self._pop_due(time.time())
+        for key, _, over_quota in due:
+            try:
+                os.unlink(key)
+            except FileNotFoundError:
+                # Already removed by the request that created it
+                continue
+            except OSError as e:
+                logger.warning(f"Failed to delete old file {key}: {e}")
+                continue
+            if over_quota:
+                self.evicted += 1
+            else:
+                self.expired += 1
+
+        for sweeper in self._sweepers:
+            try:
+                sweeper()
+            except Exception as e:
+                logger.warning(f"Janitor sweeper {sweeper} failed: {e}")
+
+        self.sweeps += 1
+        self.last_sweep_ms = (time.perf_counter() - start) * 1000
+        if due:
+            logger.debug(f"Janitor sweep released {len(due)} files in {self.last_sweep_ms:.1f}ms")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Janitor sweep failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self):
+        await asyncio.to_thread(self.scan)
+        self._task = asyncio.create_task(self._run())
+        with self._lock:
+            logger.info(f"Temp janitor started ({len(self._sizes)} files, {self._total_bytes / 1024 / 1024:.1f}MB tracked)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "tracked_files": len(self._sizes),
+                "tracked_bytes": self._total_bytes,
+                "retention_seconds": self.retention_seconds,
+                "quota_bytes": self.quota_bytes,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "sweeps": self.sweeps,
+                "last_sweep_ms": self.last_sweep_ms,
+            }
+
+
+_janitor: Optional[TempFileJanitor] = None
+
+
+def get_janitor() -> Optional[TempFileJanitor]:
+    return _janitor
+
+
+def init_janitor(
+    folders: List[Path],
+    retention_seconds: float,
+    quota_bytes: int = 0,
+    interval_seconds: float = 60,
+    rescan_seconds: float = 0,
+) -> TempFileJanitor:
+    global _janitor
+    _janitor = TempFileJanitor(folders, retention_seconds, quota_bytes, interval_seconds, rescan_seconds)
+    return _janitor
+
+
+def track_temp_file(path: Path):
+    """Hand a newly written temp file to the janitor, if one is running."""
+    if _janitor is not None:
+        _janitor.track(path)
+
+
+async def shutdown_janitor():
+    global _janitor
+    if _janitor is not None:
+        await _janitor.stop()
+        _janitor = None
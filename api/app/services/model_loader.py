@@ -1,26 +1,87 @@
-import joblib
+import math
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Tuple
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.services.preprocessor import DataPreprocessor
+from app.services.preprocessor import DataPreprocessor, SIZE_MAPPING
+from app.services.predictor import Predictor
+from app.services.compiled_models import load_artifact
+from app.services.prediction_cache import PredictionCache
+from app.services.size_lookup import SizeLookupTable, source_digests
+from app.schemas.size_suggestion import PredictRequest
 
 
 logger = get_logger(__name__)
 
+# The estimators were fitted on DataFrames; the NumPy paths feed them plain
+# ndarrays already laid out in Predictor.FEATURE_ORDER.
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+# Measurements every candidate model set is scored on before it is swapped in
+CANARY_INPUTS = [
+    (age, height, weight)
+    for age in (18, 30, 45, 65)
+    for height in (150, 165, 180, 195)
+    for weight in (45, 65, 85, 120)
+]
+
 
 class ModelLoader:
-    def __init__(self):
+    def __init__(self, model_version: Optional[str] = None):
+        self.model_version = model_version or settings.MODEL_VERSION
+        self.fingerprint: Optional[Tuple] = None
         self.models: Dict[str, Optional[Any]] = {
             "decision_tree": None,
             "neural_network": None,
         }
         self.model_status: Dict[str, dict] = {}
+        self.lookup_tables: Dict[str, Optional[SizeLookupTable]] = {}
+        self.predictors: Dict[str, Predictor] = {}
         self.is_loaded = False
         self.preprocessor = DataPreprocessor()
+        self.prediction_cache = PredictionCache(
+            max_entries=settings.PREDICTION_CACHE_SIZE,
+            ttl_seconds=settings.PREDICTION_CACHE_TTL
+        )
+    
+    def load_model(self, parallel: bool = False) -> bool:
+        """Load the scaler and every size model; with parallel=True the files load concurrently."""
+        # Taken before reading, so a file replaced mid-load shows up as a change afterwards
+        self.fingerprint = self.disk_fingerprint()
+        if parallel:
+            # Reading and decompressing the artifacts releases the GIL for much of the work
+            with ThreadPoolExecutor(max_workers=len(settings.MODEL_PATHS) + 1, thread_name_prefix="model-load") as pool:
+                scaler = pool.submit(self._load_scaler)
+                loads = [
+                    pool.submit(self._load_model_file, model_name, model_path_str)
+                    for model_name, model_path_str in settings.MODEL_PATHS.items()
+                ]
+                scaler.result()
+                success_count = sum(load.result() for load in loads)
+        else:
+            self._load_scaler()
+            success_count = sum(
+                self._load_model_file(model_name, model_path_str)
+                for model_name, model_path_str in settings.MODEL_PATHS.items()
+            )
+        
+        self.is_loaded = success_count > 0
+        logger.info(f"Loaded {success_count} out of {len(settings.MODEL_PATHS)} models")
+        
+        if settings.SIZE_LOOKUP_DIR:
+            self._load_lookup_tables()
+        
+        self._build_predictors()
+        
+        # Cached responses are only valid for the model set that produced them
+        if self.prediction_cache.set_generation(self.fingerprint):
+            logger.info("Model set changed - prediction cache cleared")
+        
+        return self.is_loaded
     
-    def load_model(self) -> bool:
-        # Load StandardScaler
+    def _load_scaler(self):
         try:
             scaler_path = Path(settings.FEATURE_SCALER_PATH)
             
@@ -34,48 +95,151 @@ class ModelLoader:
                     
         except Exception as e:
             logger.error(f"Could not load scaler: {e}", exc_info=True)
-        
-        success_count = 0
-        
-        for model_name, model_path_str in settings.MODEL_PATHS.items():
-            try:
-                model_path = Path(model_path_str)
-                
-                if not model_path.exists():
-                    error_msg = f"Model file not found at {model_path}"
-                    logger.warning(error_msg)
-                    self.model_status[model_name] = {
-                        "loaded": False,
-                        "error": error_msg
-                    }
-                    continue
-                
-                logger.info(f"Loading {model_name} model from {model_path}")
-                self.models[model_name] = joblib.load(model_path)
-                self.model_status[model_name] = {
-                    "loaded": True,
-                    "error": None
-                }
-                success_count += 1
-                logger.info(f"{model_name} model loaded successfully")
-                
-            except Exception as e:
-                error_msg = f"Failed to load {model_name} model: {str(e)}"
-                logger.error(error_msg, exc_info=True)
+    
+    def _load_model_file(self, model_name: str, model_path_str: str) -> bool:
+        try:
+            model_path = Path(model_path_str)
+            
+            if not model_path.exists():
+                error_msg = f"Model file not found at {model_path}"
+                logger.warning(error_msg)
                 self.model_status[model_name] = {
                     "loaded": False,
                     "error": error_msg
                 }
+                return False
+            
+            logger.info(f"Loading {model_name} model from {model_path}")
+            self.models[model_name] = load_artifact(model_path)
+            self.model_status[model_name] = {
+                "loaded": True,
+                "error": None
+            }
+            logger.info(f"{model_name} model loaded successfully")
+            return True
+            
+        except Exception as e:
+            error_msg = f"Failed to load {model_name} model: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            self.model_status[model_name] = {
+                "loaded": False,
+                "error": error_msg
+            }
+            return False
+    
+    def _load_lookup_tables(self):
+        for model_name, model_path_str in settings.MODEL_PATHS.items():
+            self.lookup_tables[model_name] = None
+            if self.models.get(model_name) is None:
+                continue
+            try:
+                digests = source_digests(settings.FEATURE_SCALER_PATH, model_path_str)
+                self.lookup_tables[model_name] = SizeLookupTable.load(
+                    settings.SIZE_LOOKUP_DIR, model_name, digests
+                )
+            except Exception as e:
+                logger.error(f"Failed to load size lookup table for {model_name}: {e}", exc_info=True)
+    
+    def _build_predictors(self):
+        """Construct one long-lived Predictor per loaded model."""
+        self.predictors = {
+            model_name: Predictor(
+                model, model_name, self.preprocessor, self.lookup_tables.get(model_name), self.model_version
+            )
+            for model_name, model in self.models.items()
+            if model is not None
+        }
+    
+    def disk_fingerprint(self) -> Tuple:
+        """Identify the loaded model set by version and artifact file metadata."""
+        files = []
+        for path_str in [settings.FEATURE_SCALER_PATH, *settings.MODEL_PATHS.values()]:
+            path = Path(path_str)
+            try:
+                stat = path.stat()
+                files.append((str(path.resolve()), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                files.append((str(path), None, None))
+        return (self.model_version, tuple(files))
+    
+    def run_canaries(self, reference: Optional["ModelLoader"] = None) -> dict:
+        """
+        Score CANARY_INPUTS with every loaded model and check the answers are usable.
         
-        self.is_loaded = success_count > 0
-        logger.info(f"Loaded {success_count} out of {len(settings.MODEL_PATHS)} models")
-        return self.is_loaded
+        With a reference (the serving loader), every model it serves must
+        load here too, and the share of canary rows whose recommended size
+        changed is reported per model.
+        """
+        requests = [PredictRequest(age=age, height=height, weight=weight) for age, height, weight in CANARY_INPUTS]
+        labels = set(SIZE_MAPPING.values())
+        problems: List[str] = []
+        changed: Dict[str, float] = {}
+        
+        if self.preprocessor.scaler is None and reference is not None and reference.preprocessor.scaler is not None:
+            problems.append("StandardScaler failed to load")
+        
+        for model_name in settings.MODEL_PATHS:
+            predictor = self.predictors.get(model_name)
+            served = reference is not None and reference.is_model_ready(model_name)
+            if predictor is None:
+                if served:
+                    error = self.model_status.get(model_name, {}).get("error")
+                    problems.append(f"{model_name} is served now but did not load: {error}")
+                continue
+            
+            try:
+                responses = predictor.predict_batch(requests)
+            except Exception as e:
+                problems.append(f"{model_name} failed on canary inputs: {e}")
+                continue
+            
+            unknown = sorted({r.recommended_size for r in responses} - labels)
+            if unknown:
+                problems.append(f"{model_name} predicted unknown sizes {unknown}")
+            scores = [a.score for r in responses for a in r.alternatives]
+            if not all(math.isfinite(score) and 0 <= score <= 1 for score in scores):
+                problems.append(f"{model_name} produced scores outside [0, 1]")
+            
+            if served:
+                previous = reference.get_predictor(model_name).predict_batch(requests)
+                differing = sum(a.recommended_size != b.recommended_size for a, b in zip(previous, responses))
+                changed[model_name] = differing / len(requests)
+        
+        if not self.predictors:
+            problems.append("No models loaded")
+        
+        return {
+            "passed": not problems,
+            "problems": problems,
+            "rows": len(requests),
+            "changed": changed,
+        }
+    
+    def adopt(self, candidate: "ModelLoader"):
+        """
+        Serve the candidate's model set from now on.
+        
+        Each attribute is replaced by the candidate's object, never mutated,
+        and predictors (the one the serving path reads) goes last, so a
+        request either gets an old Predictor or a new one and finishes on it.
+        """
+        self.preprocessor = candidate.preprocessor
+        self.models = candidate.models
+        self.model_status = candidate.model_status
+        self.lookup_tables = candidate.lookup_tables
+        self.model_version = candidate.model_version
+        self.fingerprint = candidate.fingerprint
+        self.predictors = candidate.predictors
+        self.is_loaded = candidate.is_loaded
+        
+        if self.prediction_cache.set_generation(self.fingerprint):
+            logger.info("Model set changed - prediction cache cleared")
     
     def get_model(self, model_type: str = "decision_tree") -> Optional[Any]:
         return self.models.get(model_type)
     
     def is_model_ready(self, model_type: str) -> bool:
-        return self.models.get(model_type) is not None
+        return model_type in self.predictors
     
     def is_ready(self) -> bool:
         return self.is_loaded
@@ -83,17 +247,28 @@ class ModelLoader:
     def get_preprocessor(self) -> DataPreprocessor:
         return self.preprocessor
     
+    def get_predictor(self, model_type: str) -> Optional[Predictor]:
+        return self.predictors.get(model_type)
+    
+    def get_lookup_table(self, model_type: str) -> Optional[SizeLookupTable]:
+        return self.lookup_tables.get(model_type)
+    
+    def get_prediction_cache(self) -> PredictionCache:
+        return self.prediction_cache
+    
     def get_status(self) -> dict:
         models_info = {}
         for model_name in self.models.keys():
             status = self.model_status.get(model_name, {"loaded": False, "error": "Not initialized"})
             models_info[model_name] = {
                 "ready": status.get("loaded", False),
-                "error": status.get("error")
+                "error": status.get("error"),
+                "lookup_table": self.lookup_tables.get(model_name) is not None
             }
         
         return {
             "ready": self.is_ready(),
             "models": models_info,
-            "model_version": settings.MODEL_VERSION
+            "model_version": self.model_version,
+            "cache": self.prediction_cache.get_stats()
         }
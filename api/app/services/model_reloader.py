@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import time
+from typing import Optional, Tuple
+from app.core.executor import get_inference_executor
+from app.core.logging import get_logger
+from app.services import inference_tasks
+from app.services.model_loader import ModelLoader
+
+
+logger = get_logger(__name__)
+
+
+class ReloadInProgress(RuntimeError):
+    """Raised when a reload is requested while another one is still running."""
+
+
+class ModelReloader:
+    """
+    Swaps a new size-model set into the serving ModelLoader without a restart.
+
+    reload() loads the configured files into a fresh ModelLoader off the
+    event loop, scores it on canary inputs and, only if those pass, has the
+    serving loader adopt it. Requests already holding a Predictor finish on
+    the old one; the prediction cache follows the model fingerprint and is
+    cleared by the swap, and process-mode inference workers are replaced so
+    they load the new files. With watch_seconds > 0 the model files are
+    polled, and a change that stays put for one more interval (so a copy in
+    progress is not picked up half-written) triggers a reload.
+    """
+
+    def __init__(self, model_loader: ModelLoader, watch_seconds: float = 0):
+        self.model_loader = model_loader
+        self.watch_seconds = watch_seconds
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Files that already failed their canaries; not retried until they change again
+        self._rejected_fingerprint: Optional[Tuple] = None
+
+        self.swapped = 0
+        self.rejected = 0
+        self.failed = 0
+        self.last_result: Optional[dict] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._lock.locked()
+
+    async def reload(self, model_version: Optional[str] = None, reason: str = "admin") -> dict:
+        """Load, check and swap in the model files on disk. Returns what happened."""
+        if self._lock.locked():
+            raise ReloadInProgress("A model reload is already running")
+
+        async with self._lock:
+            start = time.perf_counter()
+            previous_version = self.model_loader.model_version
+            candidate = ModelLoader(model_version or previous_version)
+            result = {"reason": reason, "previous_version": previous_version, "canary": None, "error": None}
+            try:
+                await asyncio.to_thread(candidate.load_model, parallel=True)
+                result["canary"] = await asyncio.to_thread(candidate.run_canaries, self.model_loader)
+            except Exception as e:
+                logger.error(f"Model reload failed: {e}", exc_info=True)
+                self.failed += 1
+                result.update(status="failed", error=str(e))
+            else:
+                if result["canary"]["passed"]:
+                    self.model_loader.adopt(candidate)
+                    get_inference_executor().recycle_workers(
+                        functools.partial(inference_tasks.init_worker, candidate.model_version)
+                    )
+                    self._rejected_fingerprint = None
+                    self.swapped += 1
+                    result["status"] = "swapped"
+                else:
+                    self._rejected_fingerprint = candidate.fingerprint
+                    self.rejected += 1
+                    result["status"] = "rejected"
+
+            result["model_version"] = self.model_loader.model_version
+            result["seconds"] = time.perf_counter() - start
+            self.last_result = result
+
+        if result["status"] == "swapped":
+            logger.info(
+                "Model set %s -> %s swapped in (%s) in %.2fs; canary rows changed: %s",
+                previous_version, result["model_version"], reason, result["seconds"], result["canary"]["changed"]
+            )
+        elif result["status"] == "rejected":
+            logger.warning(f"Model reload ({reason}) rejected by canary checks: {result['canary']['problems']}")
+        return result
+
+    async def _watch(self):
+        pending: Optional[Tuple] = None
+        while True:
+            await asyncio.sleep(self.watch_seconds)
+            try:
+                current = await asyncio.to_thread(self.model_loader.disk_fingerprint)
+                if current in (self.model_loader.fingerprint, self._rejected_fingerprint):
+                    pending = None
+                elif current != pending:
+                    # Seen for the first time; reload if it is unchanged next poll
+                    pending = current
+                elif not self.in_progress:
+                    pending = None
+                    await self.reload(reason="file change")
+            except Exception as e:
+                logger.error(f"Model file watch failed: {e}", exc_info=True)
+
+    async def start(self):
+        if self.watch_seconds > 0:
+            self._task = asyncio.create_task(self._watch())
+            logger.info(f"Watching model files for changes every {self.watch_seconds:g}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "model_version": self.model_loader.model_version,
+            "watch_seconds": self.watch_seconds,
+            "in_progress": self.in_progress,
+            "swapped": self.swapped,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "last_result": self.last_result,
+        }
+
+
+_reloader: Optional[ModelReloader] = None
+
+
+def get_model_reloader() -> Optional[ModelReloader]:
+    return _reloader
+
+
+def init_model_reloader(model_loader: ModelLoader, watch_seconds: float = 0) -> ModelReloader:
+    global _reloader
+    _reloader = ModelReloader(model_loader, watch_seconds)
+    return _reloader
+
+
+async def shutdown_model_reloader():
+    global _reloader
+    if _reloader is not None:
+        await _reloader.stop()
+        _reloader = None
@@ -0,0 +1,139 @@
+import errno
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from uuid import uuid4
+from app.core.logging import get_logger
+from app.services.janitor import track_temp_file
+
+
+logger = get_logger(__name__)
+
+
+class OutputStore:
+    """
+    Hands result files produced by the try-on backends to the output folder.
+
+    A result is renamed into place when the source is on the same filesystem,
+    hard-linked if it cannot be moved, and only streamed as a copy across
+    filesystems. Sources under one of `source_roots` (the backend download
+    folders) are owned by the store: they are removed after the handoff,
+    together with the per-result folders gradio creates, and sweep_orphans()
+    clears anything left there by failed requests.
+    """
+
+    def __init__(self, directory: Path, source_roots: Optional[List[Path]] = None):
+        self.directory = directory
+        self.source_roots = [root.resolve() for root in (source_roots or [])]
+        self._lock = threading.Lock()
+        self.renamed = 0
+        self.linked = 0
+        self.copied = 0
+        self.bytes_copied = 0
+        self.orphans_deleted = 0
+
+    def _owns(self, path: Path) -> Optional[Path]:
+        for root in self.source_roots:
+            if path.is_relative_to(root):
+                return root
+        return None
+
+    def store(self, source_path: str, prefix: str = "result") -> Path:
+        source = Path(source_path).resolve()
+        if not source.exists():
+            raise FileNotFoundError(f"Result image not found: {source_path}")
+
+        output_path = self.directory / f"{prefix}_{uuid4().hex}{source.suffix}"
+        root = self._owns(source)
+
+        mode = self._handoff(source, output_path, move=root is not None)
+        with self._lock:
+            if mode == "renamed":
+                self.renamed += 1
+            elif mode == "linked":
+                self.linked += 1
+            else:
+                self.copied += 1
+                self.bytes_copied += output_path.stat().st_size
+
+        if root is not None:
+            self._remove_source(source, root)
+
+        track_temp_file(output_path)
+        return output_path
+
+    def _handoff(self, source: Path, output_path: Path, move: bool) -> str:
+        if move:
+            try:
+                os.rename(source, output_path)
+                return "renamed"
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    logger.debug("Could not move %s into the output store: %s", source, e)
+        try:
+            os.link(source, output_path)
+            return "linked"
+        except OSError:
+            pass
+        shutil.copyfile(source, output_path)
+        return "copied"
+
+    def _remove_source(self, source: Path, root: Path):
+        source.unlink(missing_ok=True)
+        # gradio keeps each result in its own <sha256>/ folder
+        parent = source.parent
+        while parent != root and parent.is_relative_to(root):
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+    def sweep_orphans(self, max_age_seconds: float):
+        """
+        Delete stale files and stale empty folders left in the backend download folders.
+
+        Only the store's own roots are swept. Folders are removed only once
+        their mtime is past the cutoff, since gradio creates a result's
+        folder before it moves the file in; a folder emptied by this sweep
+        counts as modified now and goes in a later one.
+        """
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+
+        for root in self.source_roots:
+            if not root.exists():
+                continue
+            for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        if os.stat(path).st_mtime < cutoff:
+                            os.unlink(path)
+                            deleted += 1
+                    except OSError:
+                        continue
+                if dirpath != str(root):
+                    try:
+                        if os.stat(dirpath).st_mtime < cutoff:
+                            os.rmdir(dirpath)
+                    except OSError:
+                        pass
+
+        if deleted:
+            with self._lock:
+                self.orphans_deleted += deleted
+            logger.info(f"Removed {deleted} orphaned backend result files")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "renamed": self.renamed,
+                "linked": self.linked,
+                "copied": self.copied,
+                "bytes_copied": self.bytes_copied,
+                "orphans_deleted": self.orphans_deleted,
+            }
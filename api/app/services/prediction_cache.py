@@ -0,0 +1,18 @@
+from typing import Optional, Tuple
+from app.schemas.size_suggestion import PredictRequest
+from app.services.cache import LRUCache
+
+
+class PredictionCache(LRUCache):
+    """
+    Caches complete PredictResponse objects per (model_type, age, height, weight).
+
+    Keys are the exact validated measurements, so a hit always returns the
+    answer the model gives for that very input.
+    """
+
+    def key_for(self, request: PredictRequest) -> Optional[Tuple[str, float, float, float]]:
+        """Cache key for a request, or None when the cache is disabled."""
+        if not self.enabled:
+            return None
+        return (request.model_type.value, request.age, request.height, request.weight)
@@ -1,15 +1,21 @@
 
 import numpy as np
-import pandas as pd
-from typing import List, Tuple
+from time import perf_counter
+from typing import List, Optional, Tuple
 from app.schemas.size_suggestion import PredictRequest, PredictResponse, Alternative
+from app.core import metrics
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.preprocessor import DataPreprocessor
+from app.services.size_lookup import SizeLookupTable, TOP_K
 
 
 logger = get_logger(__name__)
 
+STAGE_SECONDS = metrics.histogram(
+    "predictor_stage_seconds", "Time spent in each stage of Predictor.predict", ["model_type", "stage"]
+)
+
 
 class Predictor:
     # Must match the feature order used during training
@@ -20,62 +26,168 @@ class Predictor:
         "neural_network": "Neural Network (MLP)",
     }
     
-    def __init__(self, model, model_type: str = "decision_tree", preprocessor: DataPreprocessor = None):
+    def __init__(
+        self,
+        model,
+        model_type: str = "decision_tree",
+        preprocessor: DataPreprocessor = None,
+        lookup_table: Optional[SizeLookupTable] = None,
+        model_version: Optional[str] = None
+    ):
         self.model = model
         self.model_type = model_type
         self.preprocessor = preprocessor if preprocessor else DataPreprocessor()
+        self.lookup_table = lookup_table
+        
+        # Everything below is fixed for the lifetime of the model, so resolve it once
+        model_display_name = self.MODEL_NAMES.get(model_type, model_type)
+        self.model_version = f"{model_version or settings.MODEL_VERSION} ({model_display_name})"
+        self.has_proba = hasattr(model, "predict_proba")
+        
+        classes = getattr(model, "classes_", [])
+        self.class_labels = [self.preprocessor.postprocess_output(c) for c in classes]
+        self._label_by_class = dict(zip(np.asarray(classes).tolist(), self.class_labels))
+        self._lookup_labels = (
+            [self.preprocessor.postprocess_output(c) for c in lookup_table.classes]
+            if lookup_table is not None else []
+        )
+        self._lookup_seconds = STAGE_SECONDS.labels(model_type, "lookup")
+        self._preprocess_seconds = STAGE_SECONDS.labels(model_type, "preprocess")
+        self._predict_seconds = STAGE_SECONDS.labels(model_type, "predict")
+        self._postprocess_seconds = STAGE_SECONDS.labels(model_type, "postprocess")
+    
+    @staticmethod
+    def top_k_indices(probas: np.ndarray, k: int = TOP_K) -> np.ndarray:
+        """
+        Column indices of the k highest scores per row, best first.
+        
+        Equal scores keep the lower class index first, the same tie-break as
+        the argmax behind model.predict, so the first alternative is always
+        the recommended size.
+        """
+        return np.argsort(-probas, axis=1, kind="stable")[:, :k]
+    
+    def _label(self, size_num) -> str:
+        label = self._label_by_class.get(size_num)
+        return label if label is not None else self.preprocessor.postprocess_output(size_num)
     
     def predict(self, request: PredictRequest) -> PredictResponse:
         try:
-            # Preprocess input (StandardScaler normalization)
-            standardized_data = self.preprocessor.preprocess_input(
+            start = perf_counter()
+            
+            # Precomputed answer for inputs on the lookup grid
+            if self.lookup_table is not None:
+                entry = self.lookup_table.lookup(request.age, request.height, request.weight)
+                if entry is not None:
+                    response = self._response_from_lookup(entry)
+                    self._lookup_seconds.observe(perf_counter() - start)
+                    return response
+            
+            # Preprocess input (StandardScaler normalization), already in FEATURE_ORDER
+            standardized_data = self.preprocessor.preprocess_array(
                 age=request.age,
                 height=request.height,
                 weight=request.weight
             )
+            preprocessed = perf_counter()
             
-            # Ensure feature order is correct
-            standardized_data = standardized_data[self.FEATURE_ORDER]
-            
-            # Get prediction
+            # Get prediction, and class scores for the alternatives if the model has them
             recommended_size_num = self.model.predict(standardized_data)[0]
             
-            # Convert numeric prediction to size label
-            recommended_size = self.preprocessor.postprocess_output(recommended_size_num)
-            
-            # Get alternatives if predict_proba exists
-            alternatives = []
+            probas = None
             alternatives_note = None
             
-            if hasattr(self.model, "predict_proba"):
+            if self.has_proba:
                 try:
-                    probas = self.model.predict_proba(standardized_data)[0]
-                    classes = self.model.classes_
-                    
-                    # Get top 3 with scores
-                    top_indices = np.argsort(probas)[::-1][:3]
-                    alternatives = [
-                        Alternative(
-                            size=self.preprocessor.postprocess_output(classes[idx]), 
-                            score=float(probas[idx])
-                        )
-                        for idx in top_indices
-                    ]
+                    probas = self.model.predict_proba(standardized_data)
                 except Exception as e:
                     logger.warning(f"Could not compute alternatives: {e}")
                     alternatives_note = "Alternatives unavailable"
             else:
                 alternatives_note = "Model does not support probability predictions"
+            predicted = perf_counter()
             
-            model_display_name = self.MODEL_NAMES.get(self.model_type, self.model_type)
+            # Convert numeric prediction to size label
+            recommended_size = self._label(recommended_size_num)
             
-            return PredictResponse(
+            # Get top 3 with scores
+            alternatives = []
+            if probas is not None:
+                top_indices = self.top_k_indices(probas)[0]
+                alternatives = [
+                    Alternative(size=self.class_labels[idx], score=float(probas[0, idx]))
+                    for idx in top_indices
+                ]
+            
+            response = PredictResponse(
                 recommended_size=recommended_size,
                 alternatives=alternatives,
-                model_version=f"{settings.MODEL_VERSION} ({model_display_name})",
+                model_version=self.model_version,
                 alternatives_note=alternatives_note
             )
             
+            self._preprocess_seconds.observe(preprocessed - start)
+            self._predict_seconds.observe(predicted - preprocessed)
+            self._postprocess_seconds.observe(perf_counter() - predicted)
+            return response
+            
         except Exception as e:
             logger.error(f"Prediction error: {e}", exc_info=True)
             raise
+    
+    def predict_batch(self, requests: List[PredictRequest]) -> List[PredictResponse]:
+        """Score many requests with one preprocessing pass and one call per model method."""
+        try:
+            standardized_data = self.preprocessor.preprocess_batch(
+                ages=[r.age for r in requests],
+                heights=[r.height for r in requests],
+                weights=[r.weight for r in requests]
+            )
+            
+            predicted = self.model.predict(standardized_data)
+            
+            probas = None
+            alternatives_note = None
+            
+            if self.has_proba:
+                try:
+                    probas = self.model.predict_proba(standardized_data)
+                except Exception as e:
+                    logger.warning(f"Could not compute alternatives: {e}")
+                    alternatives_note = "Alternatives unavailable"
+            else:
+                alternatives_note = "Model does not support probability predictions"
+            
+            top_indices = self.top_k_indices(probas) if probas is not None else None
+            
+            responses = []
+            for row, size_num in enumerate(predicted.tolist()):
+                alternatives = []
+                if top_indices is not None:
+                    alternatives = [
+                        Alternative(size=self.class_labels[idx], score=float(probas[row, idx]))
+                        for idx in top_indices[row]
+                    ]
+                responses.append(PredictResponse(
+                    recommended_size=self._label(size_num),
+                    alternatives=alternatives,
+                    model_version=self.model_version,
+                    alternatives_note=alternatives_note
+                ))
+            
+            return responses
+            
+        except Exception as e:
+            logger.error(f"Batch prediction error: {e}", exc_info=True)
+            raise
+    
+    def _response_from_lookup(self, entry: np.void) -> PredictResponse:
+        alternatives = [
+            Alternative(size=self._lookup_labels[idx], score=float(score))
+            for idx, score in zip(entry["top_classes"], entry["top_scores"])
+        ]
+        return PredictResponse(
+            recommended_size=self._lookup_labels[entry["size"]],
+            alternatives=alternatives,
+            model_version=self.model_version
+        )
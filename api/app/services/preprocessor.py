@@ -1,26 +1,43 @@
-import pandas as pd
-import joblib
+import numpy as np
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Tuple
 from app.core.logging import get_logger
+from app.services.compiled_models import load_artifact
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = get_logger(__name__)
 
+SIZE_MAPPING = {
+    1: "S",
+    2: "M",
+    3: "L",
+    4: "XL",
+    5: "XXXL"
+}
+
 
 class DataPreprocessor:
     
     def __init__(self):
         self.scaler = None
+        # Scaler parameters folded into plain arrays for the NumPy paths;
+        # identity until a scaler is loaded
+        self._mean = np.zeros(5, dtype=np.float64)
+        self._scale = np.ones(5, dtype=np.float64)
         
     def load_scaler(self, scaler_path: str = None):
         if scaler_path is None:
             scaler_path = "models/feature_scaler.pkl"
         
-        # Load the saved StandardScaler
+        # Load the saved StandardScaler (pickled or compiled .npz)
         try:
             scaler_path_obj = Path(scaler_path)
             if scaler_path_obj.exists():
-                self.scaler = joblib.load(scaler_path_obj)
+                self.scaler = load_artifact(scaler_path_obj)
+                self._mean = np.ascontiguousarray(self.scaler.mean_, dtype=np.float64)
+                self._scale = np.ascontiguousarray(self.scaler.scale_, dtype=np.float64)
                 logger.info(f"StandardScaler loaded from {scaler_path}")
                 logger.debug(f"Scaler mean: {self.scaler.mean_}")
                 logger.debug(f"Scaler scale: {self.scaler.scale_}")
@@ -31,7 +48,7 @@ class DataPreprocessor:
             logger.error(f"Error loading StandardScaler: {e}")
             self.scaler = None
     
-    def preprocess_input(self, age: float, height: float, weight: float) -> pd.DataFrame:
+    def preprocess_input(self, age: float, height: float, weight: float) -> "pd.DataFrame":
         """
         Preprocess input features for size prediction.
         
@@ -48,6 +65,9 @@ class DataPreprocessor:
         Returns:
             Preprocessed DataFrame ready for model prediction
         """
+        # Only this legacy path needs pandas; importing it costs ~0.3s of startup
+        import pandas as pd
+        
         input_data = pd.DataFrame({
             'age': [age],
             'height': [height],
@@ -75,14 +95,48 @@ class DataPreprocessor:
         
         return standardized_data
     
+    def preprocess_batch(self, ages: np.ndarray, heights: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Vectorized counterpart of preprocess_input for many rows at once.
+        
+        Args:
+            ages: Ages in years, shape (n,)
+            heights: Heights in cm, shape (n,)
+            weights: Weights in kg, shape (n,)
+            
+        Returns:
+            Standardized feature matrix of shape (n, 5) with columns
+            age, height, weight, bmi, weight-squared
+        """
+        ages = np.asarray(ages, dtype=np.float64)
+        heights = np.asarray(heights, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        
+        # Same engineered features as preprocess_input, column-stacked in training order
+        features = np.column_stack((ages, heights, weights, heights / weights, weights * weights))
+        return self._standardize(features)
+    
+    def preprocess_array(self, age: float, height: float, weight: float) -> np.ndarray:
+        """
+        Pandas-free preprocessing for a single row.
+        
+        Produces the same values as preprocess_input, as a (1, 5) array in
+        training column order.
+        """
+        features = np.array(
+            [[age, height, weight, height / weight, weight * weight]],
+            dtype=np.float64
+        )
+        return self._standardize(features)
+    
+    def _standardize(self, features: np.ndarray) -> np.ndarray:
+        # Same operations, in the same order, as StandardScaler.transform
+        if self.scaler is None:
+            logger.warning("No scaler loaded - using raw input (predictions may be incorrect!)")
+        features -= self._mean
+        features /= self._scale
+        return features
+    
     def postprocess_output(self, predicted_size: int) -> str:
         """Convert predicted numeric label back to size string."""
-        size_mapping = {
-            1: "S",
-            2: "M",
-            3: "L",
-            4: "XL",
-            5: "XXXL"
-        }
-        
-        return size_mapping.get(int(predicted_size), f"Size_{predicted_size}")
+        return SIZE_MAPPING.get(int(predicted_size), f"Size_{predicted_size}")
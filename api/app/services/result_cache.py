@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import Hashable, Optional
+from app.schemas.virtual_tryon import VirtualTryOnResponse
+from app.services.cache import LRUCache
+
+
+class TryOnResultCache(LRUCache):
+    """
+    Finished try-on responses keyed by the content digests of both uploads
+    plus the backend parameters (see tryon_backends.result_key).
+
+    Only the response is kept; the image itself stays in the output folder,
+    where the janitor may expire it independently. A hit whose output file is
+    gone is dropped and reported as a miss, so callers never get a dead URL.
+    """
+
+    def __init__(self, max_entries: int, output_dir: Path, ttl_seconds: float = 0):
+        super().__init__(max_entries, ttl_seconds)
+        self.output_dir = output_dir
+        self.stale = 0
+
+    def _output_path(self, response: VirtualTryOnResponse) -> Path:
+        return self.output_dir / Path(response.image_url).name
+
+    def get_result(self, key: Hashable) -> Optional[VirtualTryOnResponse]:
+        """Look up a result, checking its output file still exists (touches the disk)."""
+        response = self.get(key)
+        if response is None:
+            return None
+        if not self._output_path(response).exists():
+            with self._lock:
+                self._entries.pop(key, None)
+                self.stale += 1
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return response
+
+    def put_result(self, key: Hashable, response: VirtualTryOnResponse) -> None:
+        self.put(key, response)
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["stale"] = self.stale
+        return stats
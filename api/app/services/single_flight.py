@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from app.core import metrics
+
+
+COALESCED = metrics.counter(
+    "single_flight_coalesced_calls", "Calls saved by joining an identical call already in flight", ["flight"]
+)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller for a key starts the call as a task (the leader); callers
+    arriving while it runs join that task instead of starting their own, and
+    everyone gets its result or exception. Waiters await the task through
+    asyncio.shield, so a caller going away never cancels the shared call.
+    The key is forgotten as soon as the call finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self._coalesced_metric = COALESCED.labels(name)
+
+    def join(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """Return the in-flight task for key, starting it if needed, and whether this caller leads it."""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self._coalesced_metric.inc()
+            return task, False
+
+        task = asyncio.create_task(start())
+        self._calls[key] = task
+        self.calls += 1
+
+        def finished(done: asyncio.Task):
+            if self._calls.get(key) is done:
+                del self._calls[key]
+            # Nobody may be left waiting; mark the exception as retrieved
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(finished)
+        return task, True
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
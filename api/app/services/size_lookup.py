@@ -0,0 +1,105 @@
+"""
+Precomputed size predictions over an integer (age, height, weight) grid.
+
+Tables are built offline by scripts/build_size_lookup.py: one memory-mapped
+.npy per model holding the recommended class index and the top-k classes and
+scores for every grid cell, plus a .json sidecar with the grid bounds and the
+hashes of the artifacts the table was built from.
+"""
+import hashlib
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from app.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+TOP_K = 3
+
+# Bumped whenever the layout or the ranking of top_classes changes
+TABLE_FORMAT_VERSION = 3
+
+TABLE_DTYPE = np.dtype([
+    ("size", np.uint8),
+    ("top_classes", np.uint8, (TOP_K,)),
+    ("top_scores", np.float32, (TOP_K,)),
+])
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digests(scaler_path: Union[str, Path], model_path: Union[str, Path]) -> Dict[str, str]:
+    """Identify the artifacts a table is computed from."""
+    return {"scaler": file_digest(scaler_path), "model": file_digest(model_path)}
+
+
+def table_paths(directory: Union[str, Path], model_type: str) -> tuple[Path, Path]:
+    directory = Path(directory)
+    return directory / f"{model_type}_lut.npy", directory / f"{model_type}_lut.json"
+
+
+class SizeLookupTable:
+    def __init__(self, table: np.ndarray, metadata: dict):
+        self.table = table
+        self.metadata = metadata
+        self.classes = np.asarray(metadata["classes"])
+        self._age_min, self._age_max = metadata["age"]
+        self._height_min, self._height_max = metadata["height"]
+        self._weight_min, self._weight_max = metadata["weight"]
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], model_type: str, source_digests: Dict[str, str]) -> Optional["SizeLookupTable"]:
+        """Memory-map a model's table, or return None if it is missing or stale."""
+        table_path, meta_path = table_paths(directory, model_type)
+        if not table_path.exists() or not meta_path.exists():
+            logger.warning(f"No size lookup table for {model_type} in {directory}")
+            return None
+
+        with open(meta_path) as f:
+            metadata = json.load(f)
+
+        if metadata.get("format_version") != TABLE_FORMAT_VERSION:
+            logger.warning(f"Size lookup table for {model_type} uses an old format - rebuild it")
+            return None
+
+        if metadata.get("sources") != source_digests:
+            logger.warning(f"Size lookup table for {model_type} was built from different model files - ignoring it")
+            return None
+
+        table = np.load(table_path, mmap_mode="r")
+        if table.dtype != TABLE_DTYPE:
+            logger.warning(f"Size lookup table for {model_type} has an unexpected layout - ignoring it")
+            return None
+
+        logger.info(f"Size lookup table for {model_type} mapped from {table_path} (shape {table.shape})")
+        return cls(table, metadata)
+
+    def lookup(self, age: float, height: float, weight: float) -> Optional[np.void]:
+        """Return the grid cell for integer inputs inside the grid, otherwise None."""
+        if not (age.is_integer() and height.is_integer() and weight.is_integer()):
+            return None
+        if not (self._age_min <= age <= self._age_max
+                and self._height_min <= height <= self._height_max
+                and self._weight_min <= weight <= self._weight_max):
+            return None
+        return self.table[
+            int(age) - self._age_min,
+            int(height) - self._height_min,
+            int(weight) - self._weight_min,
+        ]
+
+    @staticmethod
+    def grid_axes(age: List[int], height: List[int], weight: List[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.arange(age[0], age[1] + 1, dtype=np.float64),
+            np.arange(height[0], height[1] + 1, dtype=np.float64),
+            np.arange(weight[0], weight[1] + 1, dtype=np.float64),
+        )
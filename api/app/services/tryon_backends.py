@@ -0,0 +1,309 @@
+"""
+Try-on backends: the calls that turn a saved person/garment pair into a result.
+
+Each try-on mode ("hd", "dc", "gemini") is registered with the backend it
+runs on ("ootdiffusion" or "vertex"); modes sharing a backend share its
+client pool and its in-flight limit. The routes and the job queue both go
+through run_tryon(), so new modes only need a register_backend() call.
+
+Modes registered as deterministic return the same image for the same inputs
+once the seed is fixed; result_key() identifies such requests so their
+results can be cached.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.virtual_tryon import GarmentCategory, VirtualTryOnResponse
+from app.services.backend_pool import BackendClientPool
+from app.services.file_handler import (
+    run_file_io,
+    save_result_image,
+    save_generated_image,
+    GRADIO_DOWNLOAD_DIR,
+)
+from app.services.image_normalizer import ImageProfile, normalize_image
+
+logger = logging.getLogger(__name__)
+
+OOTDIFFUSION = "ootdiffusion"
+VERTEX = "vertex"
+
+# Default parameters
+N_SAMPLES = 1
+N_STEPS = 20
+IMAGE_SCALE = 2.0
+SEED = -1
+
+# Uploads are shrunk to what each backend works at before they are sent:
+# OOTDiffusion runs at 768x1024, Vertex gets a little headroom
+IMAGE_PROFILES: Dict[str, ImageProfile] = {
+    OOTDIFFUSION: ImageProfile(max_size=(768, 1024), quality=90),
+    VERTEX: ImageProfile(max_size=(1536, 1536), quality=92),
+}
+
+
+# The client libraries are heavy to import, so they load with the first client
+def create_ootdiffusion_client():
+    from gradio_client import Client
+    client = Client(settings.OOTDIFFUSION_SPACE, download_files=str(GRADIO_DOWNLOAD_DIR))
+    logger.info(f"OOTDiffusion client initialized successfully ({settings.OOTDIFFUSION_SPACE})")
+    return client
+
+
+def create_vertexai_client():
+    from google import genai
+    client = genai.Client(
+        vertexai=settings.GOOGLE_GENAI_USE_VERTEXAI,
+        project=settings.GOOGLE_CLOUD_PROJECT,
+        location=settings.GOOGLE_CLOUD_LOCATION
+    )
+    logger.info("Vertex AI client initialized successfully")
+    return client
+
+
+CLIENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    OOTDIFFUSION: create_ootdiffusion_client,
+    VERTEX: create_vertexai_client,
+}
+
+_pools: Dict[str, BackendClientPool] = {}
+
+
+def init_backend_pools(warmup: bool = True) -> Dict[str, BackendClientPool]:
+    """Create one client pool per backend and, with warmup, start connecting in the background.
+
+    Without warmup the client libraries are imported and the clients created
+    on the first try-on request for each backend.
+    """
+    limits = {
+        OOTDIFFUSION: (settings.OOTDIFFUSION_CLIENTS, settings.OOTDIFFUSION_MAX_IN_FLIGHT),
+        VERTEX: (settings.VERTEX_CLIENTS, settings.VERTEX_MAX_IN_FLIGHT),
+    }
+    for backend, (size, max_in_flight) in limits.items():
+        pool = BackendClientPool(
+            backend,
+            CLIENT_FACTORIES[backend],
+            size=size,
+            max_in_flight=max_in_flight,
+            max_waiting=settings.BACKEND_MAX_WAITING
+        )
+        if warmup:
+            pool.start()
+        _pools[backend] = pool
+    return _pools
+
+
+def get_backend_pool(backend: str) -> BackendClientPool:
+    pool = _pools.get(backend)
+    if pool is None:
+        # Fallback for code paths that run without the app lifespan
+        pool = _pools[backend] = BackendClientPool(backend, CLIENT_FACTORIES[backend])
+    return pool
+
+
+async def wait_for_backends():
+    await asyncio.gather(*(pool.wait_warm() for pool in _pools.values()))
+
+
+async def shutdown_backend_pools():
+    for pool in _pools.values():
+        await pool.shutdown()
+    _pools.clear()
+
+
+def get_backend_stats() -> Dict[str, dict]:
+    return {backend: pool.get_stats() for backend, pool in _pools.items()}
+
+
+def get_backend_states() -> Dict[str, str]:
+    return {backend: pool.state for backend, pool in _pools.items()}
+
+
+@dataclass
+class TryOnRequest:
+    mode: str
+    vton_path: Path
+    garm_path: Path
+    category: Optional[GarmentCategory] = None
+    n_steps: int = N_STEPS
+    image_scale: float = IMAGE_SCALE
+    seed: int = SEED
+    # Content digests of the uploads, for result caching
+    vton_digest: Optional[str] = None
+    garm_digest: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    # Seconds per stage, reported back in the response
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _result_image(result) -> str:
+    return result[0]['image'] if isinstance(result, list) and len(result) > 0 else result
+
+
+def _response(request: TryOnRequest, output_path: Path, category: str) -> VirtualTryOnResponse:
+    return VirtualTryOnResponse(
+        image_url=f"/outputs/{output_path.name}",
+        message="Virtual try-on completed successfully",
+        category=category,
+        processing_time=time.time() - request.started_at
+    )
+
+
+def _predict_hd(client, request: TryOnRequest):
+    from gradio_client import handle_file
+    return client.predict(
+        handle_file(str(request.vton_path)),
+        handle_file(str(request.garm_path)),
+        N_SAMPLES,
+        request.n_steps,
+        request.image_scale,
+        request.seed,
+        api_name="/process_hd"
+    )
+
+
+def _predict_dc(client, request: TryOnRequest, category: GarmentCategory):
+    from gradio_client import handle_file
+    return client.predict(
+        vton_img=handle_file(str(request.vton_path)),
+        garm_img=handle_file(str(request.garm_path)),
+        category=category.value,
+        n_samples=N_SAMPLES,
+        n_steps=request.n_steps,
+        image_scale=request.image_scale,
+        seed=request.seed,
+        api_name="/process_dc"
+    )
+
+
+def _recontext_image(client, request: TryOnRequest):
+    from google.genai.types import (
+        Image,
+        ProductImage,
+        RecontextImageConfig,
+        RecontextImageSource,
+    )
+    return client.models.recontext_image(
+        model=settings.VIRTUAL_TRY_ON_MODEL,
+        source=RecontextImageSource(
+            person_image=Image.from_file(location=str(request.vton_path)),
+            product_images=[
+                ProductImage(product_image=Image.from_file(location=str(request.garm_path)))
+            ],
+        ),
+        config=RecontextImageConfig(
+            output_mime_type="image/jpeg",
+            number_of_images=1,
+            safety_filter_level="BLOCK_LOW_AND_ABOVE",
+        )
+    )
+
+
+async def _run_hd(request: TryOnRequest) -> VirtualTryOnResponse:
+    logger.info("Processing try-on (VITON-HD Dataset)")
+
+    # Call OOTDiffusion API
+    result = await get_backend_pool(OOTDIFFUSION).call(_predict_hd, request)
+
+    output_path = await save_result_image(_result_image(result), prefix="hd_tryon")
+    response = _response(request, output_path, "Upper Body")
+    logger.info("HD try-on completed in %.2fs", response.processing_time)
+    return response
+
+
+async def _run_dc(request: TryOnRequest) -> VirtualTryOnResponse:
+    category = request.category or GarmentCategory.UPPER_BODY
+    logger.info("Processing try-on (Dresscode dataset)")
+
+    result = await get_backend_pool(OOTDIFFUSION).call(_predict_dc, request, category)
+
+    output_path = await save_result_image(_result_image(result), prefix=f"dc_tryon_{category.value.lower()}")
+    response = _response(request, output_path, category.value)
+    logger.info("DC try-on completed in %.2fs", response.processing_time)
+    return response
+
+
+async def _run_gemini(request: TryOnRequest) -> VirtualTryOnResponse:
+    logger.info("Processing Google Vertex try-on")
+
+    result = await get_backend_pool(VERTEX).call(_recontext_image, request)
+
+    output_path = await save_generated_image(result.generated_images[0].image, prefix="gemini_tryon")
+    response = _response(request, output_path, "Google Vertex")
+    logger.info("Google Vertex try-on completed in %.2fs", response.processing_time)
+    return response
+
+
+TryOnRunner = Callable[[TryOnRequest], Awaitable[VirtualTryOnResponse]]
+
+# mode -> (backend, runner, deterministic)
+_BACKENDS: Dict[str, tuple[str, TryOnRunner, bool]] = {}
+
+
+def register_backend(mode: str, backend: str, runner: TryOnRunner, deterministic: bool = False):
+    _BACKENDS[mode] = (backend, runner, deterministic)
+
+
+def backend_for(mode: str) -> str:
+    return _BACKENDS[mode][0]
+
+
+def request_key(request: TryOnRequest) -> Optional[Tuple]:
+    """Identity of a request: same uploads, mode and parameters. None without digests."""
+    if not (request.vton_digest and request.garm_digest):
+        return None
+    category = request.category.value if request.category else None
+    return (
+        backend_for(request.mode), request.mode, category, request.n_steps, request.image_scale, request.seed,
+        request.vton_digest, request.garm_digest,
+    )
+
+
+def result_key(request: TryOnRequest) -> Optional[Tuple]:
+    """Cache key for a request whose output is reproducible, else None."""
+    _, _, deterministic = _BACKENDS[request.mode]
+    if not deterministic or request.seed < 0:
+        return None
+    return request_key(request)
+
+
+async def _normalize_file(path: Path, profile: ImageProfile) -> tuple[Path, int, int]:
+    try:
+        return await run_file_io(normalize_image, path, profile)
+    except Exception as e:
+        # The backend gets the upload as-is
+        logger.warning(f"Could not normalize {path.name}: {str(e)}")
+        return path, 0, 0
+
+
+async def normalize_uploads(request: TryOnRequest):
+    """Replace the request's uploads with copies sized for its backend."""
+    profile = IMAGE_PROFILES.get(backend_for(request.mode))
+    if profile is None or not settings.TRYON_NORMALIZE_IMAGES:
+        return
+    start = time.perf_counter()
+    (request.vton_path, vton_before, vton_after), (request.garm_path, garm_before, garm_after) = await asyncio.gather(
+        _normalize_file(request.vton_path, profile),
+        _normalize_file(request.garm_path, profile),
+    )
+    request.timings["normalize"] = time.perf_counter() - start
+    before, after = vton_before + garm_before, vton_after + garm_after
+    if before != after:
+        logger.info("Normalized %s uploads: %d -> %d bytes (%d saved)", request.mode, before, after, before - after)
+
+
+async def run_tryon(request: TryOnRequest) -> VirtualTryOnResponse:
+    _, runner, _ = _BACKENDS[request.mode]
+    await normalize_uploads(request)
+    return await runner(request)
+
+
+register_backend("hd", OOTDIFFUSION, _run_hd, deterministic=True)
+register_backend("dc", OOTDIFFUSION, _run_dc, deterministic=True)
+# The Vertex call takes no seed here, so its results are never reused
+register_backend("gemini", VERTEX, _run_gemini)
@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+from fastapi import HTTPException
+from app.core.logging import get_logger
+from app.schemas.virtual_tryon import JobStatus, TryOnJobResponse, VirtualTryOnResponse
+
+
+logger = get_logger(__name__)
+
+JobWork = Callable[[], Awaitable[VirtualTryOnResponse]]
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when a backend already has max_queue jobs waiting."""
+
+
+@dataclass
+class TryOnJob:
+    id: str
+    mode: str
+    backend: str
+    work: Optional[JobWork]
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[VirtualTryOnResponse] = None
+    error: Optional[str] = None
+    # Submitter's context, so the work logs under the request that queued it
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def _set_status(self, status: JobStatus):
+        self.status = status
+        # Wake everyone waiting on this change and arm a fresh event for the next one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait until the status moves on; returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_response(self) -> TryOnJobResponse:
+        return TryOnJobResponse(
+            job_id=self.id,
+            mode=self.mode,
+            status=self.status,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class TryOnJobQueue:
+    """
+    Runs try-on work in the background and keeps its outcome for polling.
+
+    Each backend gets its own FIFO and `concurrency[backend]` worker tasks,
+    so a slow diffusion queue never holds up Vertex jobs. At most `max_queue`
+    jobs wait per backend (0 means unbounded). Finished jobs are kept for
+    `retention_seconds` and then forgotten.
+    """
+
+    def __init__(self, concurrency: Dict[str, int], max_queue: int = 0, retention_seconds: float = 3600):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, TryOnJob] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _queue_for(self, backend: str) -> asyncio.Queue:
+        # Workers start on first use so they bind to the running event loop
+        queue = self._queues.get(backend)
+        if queue is None:
+            queue = self._queues[backend] = asyncio.Queue()
+            self._workers[backend] = [
+                asyncio.create_task(self._worker(backend, queue))
+                for _ in range(max(1, self.concurrency.get(backend, 1)))
+            ]
+        return queue
+
+    def submit(self, mode: str, backend: str, work: JobWork) -> TryOnJob:
+        self._prune()
+        queue = self._queue_for(backend)
+        if self.max_queue and queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise JobQueueFull(f"{backend} job queue is full ({queue.qsize()} waiting)")
+
+        job = TryOnJob(id=uuid4().hex, mode=mode, backend=backend, work=work)
+        self._jobs[job.id] = job
+        queue.put_nowait(job)
+        logger.info("Queued %s try-on job %s (%d waiting on %s)", mode, job.id, queue.qsize(), backend)
+        return job
+
+    def add_finished(self, mode: str, backend: str, result: VirtualTryOnResponse) -> TryOnJob:
+        """Record a job whose result is already known (e.g. served from cache)."""
+        self._prune()
+        now = time.time()
+        job = TryOnJob(
+            id=uuid4().hex, mode=mode, backend=backend, work=None,
+            status=JobStatus.DONE, started_at=now, finished_at=now, result=result
+        )
+        self._jobs[job.id] = job
+        self.completed += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[TryOnJob]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self, backend: str, queue: asyncio.Queue):
+        while True:
+            job: TryOnJob = await queue.get()
+            job.started_at = time.time()
+            job._set_status(JobStatus.RUNNING)
+            try:
+                job.result = await asyncio.create_task(job.work(), context=job.context)
+                job.finished_at = time.time()
+                job._set_status(JobStatus.DONE)
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.error = "Cancelled"
+                job.finished_at = time.time()
+                job._set_status(JobStatus.FAILED)
+                raise
+            except Exception as e:
+                job.error = e.detail if isinstance(e, HTTPException) else f"Virtual try-on failed: {e}"
+                job.finished_at = time.time()
+                job._set_status(JobStatus.FAILED)
+                self.failed += 1
+                logger.error(f"Try-on job {job.id} failed: {job.error}")
+            finally:
+                job.work = None
+                queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def shutdown(self):
+        workers = [task for tasks in self._workers.values() for task in tasks]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "backends": {
+                backend: {
+                    "workers": len(self._workers.get(backend, [])),
+                    "queued": queue.qsize(),
+                }
+                for backend, queue in self._queues.items()
+            },
+            "tracked_jobs": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+_job_queue: Optional[TryOnJobQueue] = None
+
+
+def get_job_queue() -> TryOnJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        # Fallback for code paths that run without the app lifespan
+        _job_queue = TryOnJobQueue(concurrency={})
+    return _job_queue
+
+
+def init_job_queue(concurrency: Dict[str, int], max_queue: int = 0, retention_seconds: float = 3600) -> TryOnJobQueue:
+    global _job_queue
+    _job_queue = TryOnJobQueue(concurrency, max_queue, retention_seconds)
+    return _job_queue
+
+
+async def shutdown_job_queue():
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.shutdown()
+        _job_queue = None
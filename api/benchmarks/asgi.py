@@ -0,0 +1,29 @@
+"""Helpers for driving the FastAPI app in-process from benchmarks."""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def lifespan_client(app: FastAPI) -> AsyncIterator[httpx.AsyncClient]:
+    """Run the app's lifespan and yield an httpx client bound to it over ASGI."""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (in ms) for a run."""
+    values = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
@@ -0,0 +1,102 @@
+"""
+Garment classifier preprocessing: full decode vs draft() decode with fused
+normalization, timed per stage over a directory of images.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_garment_preprocess --images ../frontend/public/garments
+"""
+import argparse
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.services.garment_classifier import GarmentClassifier, INPUT_SIZE, _MEAN, _STD
+from benchmarks.stubs import make_jpeg
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def legacy_stages(image_bytes: bytes, timings: dict) -> np.ndarray:
+    start = time.perf_counter()
+    img = Image.open(BytesIO(image_bytes)).convert("RGB")
+    decoded = time.perf_counter()
+    img = img.resize((INPUT_SIZE, INPUT_SIZE), Image.BILINEAR)
+    resized = time.perf_counter()
+    x = np.array(img, dtype=np.float32) / 255.0
+    x = (x - _MEAN) / _STD
+    x = np.expand_dims(x.transpose(2, 0, 1), axis=0)
+    done = time.perf_counter()
+    timings["decode"] += decoded - start
+    timings["resize"] += resized - decoded
+    timings["normalize"] += done - resized
+    return x
+
+
+def fast_stages(classifier: GarmentClassifier, image_bytes: bytes, timings: dict) -> np.ndarray:
+    start = time.perf_counter()
+    img = Image.open(BytesIO(image_bytes))
+    img.draft("RGB", (INPUT_SIZE, INPUT_SIZE))
+    img = img.convert("RGB")
+    decoded = time.perf_counter()
+    img = img.resize((INPUT_SIZE, INPUT_SIZE), Image.BILINEAR)
+    resized = time.perf_counter()
+    x = classifier._input_buffer(1)
+    classifier._normalize_into(img, x[0])
+    done = time.perf_counter()
+    timings["decode"] += decoded - start
+    timings["resize"] += resized - decoded
+    timings["normalize"] += done - resized
+    return x
+
+
+def load_images(directory: Path, synthetic: int) -> list[bytes]:
+    images = []
+    if directory and directory.exists():
+        images = [p.read_bytes() for p in sorted(directory.rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES]
+    # Phone-sized photos, where full-resolution decode hurts most
+    images += [make_jpeg(3024, 4032, seed=i) for i in range(synthetic)]
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, default=Path("../frontend/public/garments"))
+    parser.add_argument("--synthetic", type=int, default=3, help="Extra generated 12MP JPEGs")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.synthetic)
+    if not images:
+        raise SystemExit("No images to benchmark")
+    classifier = GarmentClassifier(model_path="")
+
+    results = {}
+    max_diff = 0.0
+    for name in ("legacy", "fast"):
+        timings = {"decode": 0.0, "resize": 0.0, "normalize": 0.0}
+        for _ in range(args.rounds):
+            for image_bytes in images:
+                if name == "legacy":
+                    legacy_stages(image_bytes, timings)
+                else:
+                    fast = fast_stages(classifier, image_bytes, timings).copy()
+                    max_diff = max(max_diff, float(np.abs(fast - legacy_stages(image_bytes, dict.fromkeys(timings, 0.0))).max()))
+        calls = args.rounds * len(images)
+        results[name] = {stage: total / calls * 1000 for stage, total in timings.items()}
+
+    print(f"{len(images)} images x {args.rounds} rounds (ms per image)")
+    print(f"{'path':8s} {'decode':>8s} {'resize':>8s} {'normalize':>10s} {'total':>8s}")
+    for name, stages in results.items():
+        print(
+            f"{name:8s} {stages['decode']:8.2f} {stages['resize']:8.2f} "
+            f"{stages['normalize']:10.3f} {sum(stages.values()):8.2f}"
+        )
+    print(f"max |fast - legacy| over normalized inputs: {max_diff:.3f}")
+
+
+if __name__ == "__main__":
+    main()
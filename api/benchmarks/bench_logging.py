@@ -0,0 +1,166 @@
+"""
+Logging cost on the event loop: direct stdout handler vs the queue handler.
+
+Concurrent tasks log like request handlers do while a probe task measures
+how late the event loop wakes it up. stdout is replaced by a stream that
+sleeps --write-ms per write to stand in for a slow terminal, pipe or log
+shipper. Two setups are compared:
+  direct   StreamHandler on the loop thread, f-string messages (the old setup)
+  queue    the app's queue handler and listener thread, %-style messages
+Also checks that each record carries the request id of the task that logged
+it, against a single shared attribute as the old client IP filter used, and
+times a disabled debug call with an f-string vs lazy arguments. Run from the
+api/ directory:
+    python -m benchmarks.bench_logging --tasks 50 --records 40 --write-ms 0.2
+"""
+import argparse
+import asyncio
+import io
+import logging
+import logging.handlers
+import queue
+import time
+import timeit
+
+import numpy as np
+
+from app.core.logging import RequestContextFilter, _DeferredFormatQueueHandler, bind_request_context, request_id_var
+
+FORMAT = "%(asctime)s [%(levelname)s] [%(client_ip)s] [%(request_id)s] %(name)s: %(message)s"
+
+
+class SlowStream(io.TextIOBase):
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay_s)
+        return len(text)
+
+
+class SharedAttributeFilter(logging.Filter):
+    # One mutable attribute for the whole process, like the old ClientIPFilter
+    request_id = "-"
+
+    def filter(self, record):
+        record.request_id = self.request_id
+        record.client_ip = "bench"
+        return True
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def install(handler: logging.Handler, context_filter: logging.Filter) -> logging.Logger:
+    handler.addFilter(context_filter)
+    logger = logging.getLogger("bench.logging")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+async def drive(logger: logging.Logger, tasks: int, records: int, lazy: bool, shared: SharedAttributeFilter = None):
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def handler(task_id: int):
+        request_id = f"req{task_id}"
+        if shared is not None:
+            shared.request_id = request_id
+        else:
+            bind_request_context(request_id, "bench")
+        for i in range(records):
+            if lazy:
+                logger.info("%s step %d of %d", request_id, i, records)
+            else:
+                logger.info(f"{request_id} step {i} of {records}")
+            await asyncio.sleep(0)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(task_id) for task_id in range(tasks)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, lags
+
+
+def summary(label: str, elapsed: float, lags: list, count: int):
+    lag_ms = np.asarray(lags) * 1000
+    print(
+        f"{label:7s} {count / elapsed:9.0f} records/s on the loop  "
+        f"loop lag p50 {np.percentile(lag_ms, 50):6.2f} ms  p99 {np.percentile(lag_ms, 99):7.2f} ms  "
+        f"max {lag_ms.max():7.2f} ms"
+    )
+
+
+def run_direct(args):
+    handler = logging.StreamHandler(SlowStream(args.write_ms / 1000))
+    handler.setFormatter(logging.Formatter(FORMAT))
+    logger = install(handler, RequestContextFilter())
+    elapsed, lags = asyncio.run(drive(logger, args.tasks, args.records, lazy=False))
+    summary("direct", elapsed, lags, args.tasks * args.records)
+
+
+def run_queue(args):
+    handler = logging.StreamHandler(SlowStream(args.write_ms / 1000))
+    handler.setFormatter(logging.Formatter(FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    logger = install(_DeferredFormatQueueHandler(log_queue), RequestContextFilter())
+    elapsed, lags = asyncio.run(drive(logger, args.tasks, args.records, lazy=True))
+    drain_start = time.perf_counter()
+    listener.stop()
+    summary("queue", elapsed, lags, args.tasks * args.records)
+    print(f"        listener drained the backlog {time.perf_counter() - drain_start:.2f}s after the load ended")
+
+
+def check_attribution(args):
+    for label, shared in (("shared", SharedAttributeFilter()), ("context", None)):
+        capture = CaptureHandler()
+        logger = install(capture, shared if shared is not None else RequestContextFilter())
+        asyncio.run(drive(logger, args.tasks, 5, lazy=True, shared=shared))
+        wrong = sum(1 for record in capture.records if record.request_id != record.args[0])
+        print(f"{label:7s} request id attribution: {wrong} of {len(capture.records)} records tagged with another request")
+
+
+def time_disabled_debug():
+    logger = logging.getLogger("bench.logging")
+    logger.setLevel(logging.INFO)
+    request_id, size = "req1", 123456
+    number = 200000
+    eager = timeit.timeit(lambda: logger.debug(f"Saved upload {request_id} ({size} bytes)"), number=number)
+    lazy = timeit.timeit(lambda: logger.debug("Saved upload %s (%d bytes)", request_id, size), number=number)
+    print(f"disabled debug call: f-string {eager / number * 1e9:5.0f} ns, lazy {lazy / number * 1e9:5.0f} ns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50, help="Concurrent logging tasks")
+    parser.add_argument("--records", type=int, default=40, help="Records per task")
+    parser.add_argument("--write-ms", type=float, default=0.2, help="Simulated stdout cost per record")
+    args = parser.parse_args()
+
+    request_id_var.set("-")
+    run_direct(args)
+    run_queue(args)
+    check_attribution(args)
+    time_disabled_debug()
+
+
+if __name__ == "__main__":
+    main()
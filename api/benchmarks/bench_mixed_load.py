@@ -0,0 +1,110 @@
+"""
+Tail latency of /predict while garment classification runs concurrently.
+
+Drives a mix of /predict and /try-on-hd requests through an in-process ASGI
+client, once with inference inline on the event loop and once per configured
+executor kind. The garment classifier and OOTDiffusion client are replaced
+by CPU-bound / sleeping stand-ins. Each try-on sends a different garment
+so it is classified and run; --same-images sends one pair throughout, and
+the calls saved by coalescing identical in-flight try-ons are reported
+either way. Run from the api/ directory:
+    python -m benchmarks.bench_mixed_load
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+
+from app.core.config import settings
+from app.services import file_handler, garment_classifier
+from benchmarks.asgi import lifespan_client, latency_summary
+from benchmarks.stubs import StubGarmentClassifier, StubOOTDiffusionClient, make_jpeg
+
+
+async def run(app, args):
+    from app.api.virtual_tryon import TRYON_FLIGHTS
+    from app.services import tryon_backends
+
+    person = make_jpeg(seed=2)
+    garment_count = 1 if args.same_images else args.tryon_clients * args.tryons
+    garments = [make_jpeg(seed=100 + i) for i in range(garment_count)]
+    next_garment = itertools.count()
+    stub_client = StubOOTDiffusionClient(latency_s=args.backend_ms / 1000, download_dir=file_handler.GRADIO_DOWNLOAD_DIR)
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = lambda: stub_client
+
+    rng = random.Random(0)
+    predict_latencies = []
+
+    async with lifespan_client(app) as client:
+        await tryon_backends.wait_for_backends()
+        garment_classifier._classifier = StubGarmentClassifier(work_ms=args.classify_ms)
+
+        async def predict_worker():
+            for _ in range(args.predicts):
+                payload = {
+                    "age": rng.randint(18, 70),
+                    "height": round(rng.uniform(145, 200), 1),
+                    "weight": round(rng.uniform(40, 130), 1),
+                }
+                start = time.perf_counter()
+                response = await client.post("/api/size-suggestion/predict", json=payload)
+                predict_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def tryon_worker():
+            for _ in range(args.tryons):
+                files = {
+                    "vton_img": ("person.jpg", person, "image/jpeg"),
+                    "garm_img": ("garment.jpg", garments[next(next_garment) % garment_count], "image/jpeg"),
+                }
+                response = await client.post("/api/virtual-tryon/try-on-hd", files=files)
+                response.raise_for_status()
+
+        coalesced_before = TRYON_FLIGHTS.coalesced
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(predict_worker() for _ in range(args.predict_clients)),
+            *(tryon_worker() for _ in range(args.tryon_clients)),
+        )
+        elapsed = time.perf_counter() - start
+
+    summary = latency_summary(predict_latencies, elapsed)
+    summary["coalesced"] = TRYON_FLIGHTS.coalesced - coalesced_before
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", nargs="+", default=["inline", "thread"], help="Executor kinds to compare")
+    parser.add_argument("--predict-clients", type=int, default=4)
+    parser.add_argument("--predicts", type=int, default=100, help="Requests per predict client")
+    parser.add_argument("--tryon-clients", type=int, default=4)
+    parser.add_argument("--tryons", type=int, default=10, help="Requests per try-on client")
+    parser.add_argument("--classify-ms", type=float, default=40.0, help="CPU time per garment classification")
+    parser.add_argument("--backend-ms", type=float, default=0.0, help="Stub OOTDiffusion latency per call")
+    parser.add_argument(
+        "--same-images", action="store_true",
+        help="Send one person/garment pair with every try-on (mostly measures coalescing and the result cache)"
+    )
+    args = parser.parse_args()
+
+    settings.PREDICTION_CACHE_SIZE = 0
+    # With --same-images every request reuses one garment; keep each one classified
+    settings.GARMENT_CACHE_SIZE = 0
+    logging.disable(logging.WARNING)
+
+    from app.main import app
+
+    for kind in args.kinds:
+        settings.INFERENCE_EXECUTOR = kind
+        summary = asyncio.run(run(app, args))
+        print(
+            f"{kind:8s} /predict under mixed load: p50 {summary['p50_ms']:7.2f} ms  "
+            f"p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms  ({summary['coalesced']} try-ons coalesced)"
+        )
+
+
+if __name__ == "__main__":
+    main()
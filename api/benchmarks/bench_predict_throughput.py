@@ -0,0 +1,88 @@
+"""
+/predict throughput with per-request Predictor construction vs the
+preconstructed registry on ModelLoader, over an in-process ASGI client.
+
+The prediction cache and lookup tables are disabled so every request runs
+the model. Run from the api/ directory:
+    python -m benchmarks.bench_predict_throughput
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from app.core.config import settings
+from app.services.model_loader import ModelLoader
+from app.services.predictor import Predictor
+from benchmarks.asgi import lifespan_client, latency_summary
+
+
+def per_request_predictor(self, model_type):
+    # What the route did before the registry: a fresh Predictor every call
+    return Predictor(self.get_model(model_type), model_type, self.get_preprocessor())
+
+
+async def run(app, payloads, concurrency):
+    latencies = []
+    queue = list(payloads)
+
+    async with lifespan_client(app) as client:
+        # Warm up both models
+        for model_type in settings.MODEL_PATHS:
+            await client.post("/api/size-suggestion/predict", json={**payloads[0], "model_type": model_type})
+
+        async def worker():
+            while queue:
+                payload = queue.pop()
+                start = time.perf_counter()
+                response = await client.post("/api/size-suggestion/predict", json=payload)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latency_summary(latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    settings.PREDICTION_CACHE_SIZE = 0
+    settings.SIZE_LOOKUP_DIR = ""
+    logging.disable(logging.INFO)
+
+    from app.main import app
+
+    rng = random.Random(0)
+    payloads = [
+        {
+            "age": rng.randint(18, 70),
+            "height": round(rng.uniform(145, 200), 1),
+            "weight": round(rng.uniform(40, 130), 1),
+            "model_type": rng.choice(list(settings.MODEL_PATHS)),
+        }
+        for _ in range(args.requests)
+    ]
+
+    registry_getter = ModelLoader.get_predictor
+    results = {}
+    for label, getter in (("before (per-request Predictor)", per_request_predictor), ("after (registry)", registry_getter)):
+        ModelLoader.get_predictor = getter
+        results[label] = asyncio.run(run(app, payloads, args.concurrency))
+    ModelLoader.get_predictor = registry_getter
+
+    for label, summary in results.items():
+        print(
+            f"{label:32s} {summary['throughput_rps']:8.1f} req/s  "
+            f"p50 {summary['p50_ms']:.2f} ms  p99 {summary['p99_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
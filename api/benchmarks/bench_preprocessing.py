@@ -0,0 +1,58 @@
+"""
+Microbenchmark: pandas preprocessing vs the NumPy fast path.
+
+Run from the api/ directory:
+    python -m benchmarks.bench_preprocessing
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.preprocessor import DataPreprocessor
+
+
+SAMPLES = [
+    (25.0, 170.0, 65.0),
+    (41.0, 158.5, 72.3),
+    (33.0, 182.0, 90.0),
+    (58.0, 165.0, 55.5),
+]
+
+
+def check_parity(preprocessor: DataPreprocessor) -> None:
+    for age, height, weight in SAMPLES:
+        expected = preprocessor.preprocess_input(age, height, weight).to_numpy()
+        actual = preprocessor.preprocess_array(age, height, weight)
+        if not np.array_equal(expected, actual):
+            raise AssertionError(f"Fast path mismatch for {(age, height, weight)}: {expected} != {actual}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per path (best is reported)")
+    args = parser.parse_args()
+
+    preprocessor = DataPreprocessor()
+    preprocessor.load_scaler(settings.FEATURE_SCALER_PATH)
+    check_parity(preprocessor)
+
+    paths = {
+        "pandas (preprocess_input)": lambda: preprocessor.preprocess_input(33.0, 170.0, 65.0),
+        "numpy  (preprocess_array)": lambda: preprocessor.preprocess_array(33.0, 170.0, 65.0),
+    }
+
+    results = {}
+    for name, fn in paths.items():
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        results[name] = best / args.number * 1e6
+        print(f"{name}: {results[name]:8.2f} us/call")
+
+    pandas_us, numpy_us = results.values()
+    print(f"speedup: {pandas_us / numpy_us:.1f}x (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Try-on throughput and /predict latency when the disk is slow.
+
+Every upload write, result handoff and temp file delete in file_handler gets an
+artificial delay (--disk-ms), then the same mix of /try-on-hd and /predict
+requests is driven through an in-process ASGI client with file I/O inline on
+the event loop (FILE_IO_WORKERS=0) and offloaded to the file I/O pool. The
+garment classifier and OOTDiffusion client are replaced by stand-ins. Each
+try-on sends a different garment so it does the full work; --same-images
+sends one pair throughout, and the calls saved by coalescing identical
+in-flight try-ons are reported either way. Run from the api/ directory:
+    python -m benchmarks.bench_slow_disk --disk-ms 20
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import logging
+import random
+import time
+
+from app.core.config import settings
+from app.services import file_handler, garment_classifier
+from benchmarks.asgi import lifespan_client, latency_summary
+from benchmarks.stubs import StubGarmentClassifier, StubOOTDiffusionClient, make_jpeg
+
+
+def slow_disk(fn, delay_s: float):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        time.sleep(delay_s)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+async def run(app, args):
+    from app.api.virtual_tryon import TRYON_FLIGHTS
+    from app.services import tryon_backends
+
+    person = make_jpeg(seed=2)
+    garment_count = 1 if args.same_images else args.tryon_clients * args.tryons
+    garments = [make_jpeg(seed=100 + i) for i in range(garment_count)]
+    next_garment = itertools.count()
+    stub_client = StubOOTDiffusionClient(latency_s=0, download_dir=file_handler.GRADIO_DOWNLOAD_DIR)
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = lambda: stub_client
+
+    rng = random.Random(0)
+    tryon_latencies = []
+    predict_latencies = []
+
+    async with lifespan_client(app) as client:
+        await tryon_backends.wait_for_backends()
+        garment_classifier._classifier = StubGarmentClassifier(work_ms=1)
+
+        async def tryon_worker():
+            for _ in range(args.tryons):
+                files = {
+                    "vton_img": ("person.jpg", person, "image/jpeg"),
+                    "garm_img": ("garment.jpg", garments[next(next_garment) % garment_count], "image/jpeg"),
+                }
+                start = time.perf_counter()
+                response = await client.post("/api/virtual-tryon/try-on-hd", files=files)
+                tryon_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def predict_worker():
+            while len(tryon_latencies) < args.tryon_clients * args.tryons:
+                payload = {
+                    "age": rng.randint(18, 70),
+                    "height": round(rng.uniform(145, 200), 1),
+                    "weight": round(rng.uniform(40, 130), 1),
+                }
+                start = time.perf_counter()
+                response = await client.post("/api/size-suggestion/predict", json=payload)
+                predict_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        coalesced_before = TRYON_FLIGHTS.coalesced
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(tryon_worker() for _ in range(args.tryon_clients)),
+            predict_worker(),
+        )
+        elapsed = time.perf_counter() - start
+
+    tryon = latency_summary(tryon_latencies, elapsed)
+    tryon["coalesced"] = TRYON_FLIGHTS.coalesced - coalesced_before
+    return tryon, latency_summary(predict_latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disk-ms", type=float, default=20.0, help="Delay added to every file write, handoff and delete")
+    parser.add_argument("--workers", type=int, default=4, help="File I/O pool size for the offloaded run")
+    parser.add_argument("--tryon-clients", type=int, default=8)
+    parser.add_argument("--tryons", type=int, default=10, help="Requests per try-on client")
+    parser.add_argument(
+        "--same-images", action="store_true",
+        help="Send one person/garment pair with every try-on (mostly measures coalescing and the result cache)"
+    )
+    args = parser.parse_args()
+
+    settings.PREDICTION_CACHE_SIZE = 0
+    logging.disable(logging.WARNING)
+
+    delay_s = args.disk_ms / 1000
+    for name in ("_write_upload", "_delete_files"):
+        setattr(file_handler, name, slow_disk(getattr(file_handler, name), delay_s))
+    output_store = file_handler.get_output_store()
+    output_store.store = slow_disk(output_store.store, delay_s)
+
+    from app.main import app
+
+    for label, workers in (("inline", 0), ("offload", args.workers)):
+        settings.FILE_IO_WORKERS = workers
+        tryon, predict = asyncio.run(run(app, args))
+        print(
+            f"{label:8s} disk +{args.disk_ms:.0f} ms: try-on {tryon['throughput_rps']:6.1f} req/s "
+            f"(p95 {tryon['p95_ms']:7.1f} ms, {tryon['coalesced']} coalesced)  /predict p95 {predict['p95_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cold start: time from a fresh interpreter to the first /predict response.
+
+Each run is a new Python process that imports app.main, runs the lifespan
+and sends one /predict over an in-process ASGI client, then reads /ready.
+Backend clients are stubs, but their factories import the real
+gradio_client / google-genai packages first so the import cost is kept.
+Two setups are compared:
+  sequential  models loaded one after another, backends warmed at startup
+  parallel    models and the garment classifier loaded concurrently,
+              backend clients (and their imports) deferred to first use
+Reports the median over --runs of: process spawn to first /predict
+response, the import of app.main, the lifespan, and the first /predict.
+Run from the api/ directory:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SETUPS = {
+    "sequential": {"STARTUP_PARALLEL_LOAD": "false", "BACKEND_WARMUP_ON_STARTUP": "true"},
+    "parallel": {"STARTUP_PARALLEL_LOAD": "true", "BACKEND_WARMUP_ON_STARTUP": "false"},
+}
+
+
+def importing_factory(module: str, make_stub):
+    def factory():
+        __import__(module)
+        return make_stub()
+    return factory
+
+
+async def first_predict(app) -> dict:
+    from app.services import file_handler, tryon_backends
+    from benchmarks.asgi import lifespan_client
+    from benchmarks.stubs import StubOOTDiffusionClient, StubVertexClient
+
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = importing_factory(
+        "gradio_client", lambda: StubOOTDiffusionClient(latency_s=0, download_dir=file_handler.GRADIO_DOWNLOAD_DIR)
+    )
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.VERTEX] = importing_factory(
+        "google.genai", lambda: StubVertexClient(latency_s=0)
+    )
+
+    lifespan_start = time.perf_counter()
+    async with lifespan_client(app) as client:
+        lifespan_seconds = time.perf_counter() - lifespan_start
+        predict_start = time.perf_counter()
+        response = await client.post("/api/size-suggestion/predict", json={"age": 30, "height": 170, "weight": 65})
+        response.raise_for_status()
+        predict_seconds = time.perf_counter() - predict_start
+        answered_at = time.time()
+        ready = (await client.get("/ready")).json()
+        await tryon_backends.wait_for_backends()
+    return {"lifespan": lifespan_seconds, "first_predict": predict_seconds, "first_predict_at": answered_at, "ready": ready}
+
+
+def child():
+    import logging
+    logging.disable(logging.WARNING)
+
+    import_start = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - import_start
+
+    result = asyncio.run(first_predict(app))
+    result["import"] = import_seconds
+    print(json.dumps(result))
+
+
+def run_once(setup: dict) -> dict:
+    env = {**os.environ, **setup}
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["cold_start"] = result["first_predict_at"] - spawned
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per setup")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    # Warm the OS page cache so the first setup is not penalized
+    run_once(SETUPS["sequential"])
+    results = {name: [] for name in SETUPS}
+    for _ in range(args.runs):
+        # Interleave the setups so drift on the machine hits both alike
+        for name, setup in SETUPS.items():
+            results[name].append(run_once(setup))
+
+    for name, runs in results.items():
+        median = {
+            key: statistics.median(run[key] for run in runs) * 1000
+            for key in ("cold_start", "import", "lifespan", "first_predict")
+        }
+        print(
+            f"{name:10s} cold start {median['cold_start']:7.0f} ms  import {median['import']:6.0f} ms  "
+            f"lifespan {median['lifespan']:6.0f} ms  first /predict {median['first_predict']:6.1f} ms"
+        )
+        print(f"{'':10s} /ready after first /predict: {runs[-1]['ready']['components']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+End-to-end run of the try-on job endpoints against a stub backend.
+
+Submits --jobs HD try-on jobs at once through /jobs/try-on-hd, then follows
+half of them by polling /jobs/{id} and the other half over the
+/jobs/{id}/events stream, and reports how long submission held the
+connection versus how long the jobs took to finish. The garment classifier
+and OOTDiffusion client are replaced by stand-ins; exits non-zero if a job
+does not finish as done. Run from the api/ directory:
+    python -m benchmarks.bench_tryon_jobs --jobs 20 --backend-ms 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from app.core.config import settings
+from app.services import file_handler, garment_classifier
+from benchmarks.asgi import lifespan_client, latency_summary
+from benchmarks.stubs import StubGarmentClassifier, StubOOTDiffusionClient, make_jpeg
+
+
+async def follow_by_polling(client, job_id: str, interval_s: float) -> dict:
+    while True:
+        job = (await client.get(f"/api/virtual-tryon/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(interval_s)
+
+
+async def follow_by_events(client, job_id: str) -> dict:
+    job = None
+    async with client.stream("GET", f"/api/virtual-tryon/jobs/{job_id}/events") as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                job = json.loads(line[len("data: "):])
+    return job
+
+
+async def run(app, args):
+    from app.services import tryon_backends
+
+    person = make_jpeg(seed=2)
+    stub_client = StubOOTDiffusionClient(latency_s=args.backend_ms / 1000, download_dir=file_handler.GRADIO_DOWNLOAD_DIR)
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = lambda: stub_client
+
+    async with lifespan_client(app) as client:
+        await tryon_backends.wait_for_backends()
+        garment_classifier._classifier = StubGarmentClassifier(work_ms=1)
+
+        async def submit(i: int):
+            files = {
+                "vton_img": ("person.jpg", person, "image/jpeg"),
+                "garm_img": ("garment.jpg", make_jpeg(seed=100 + i), "image/jpeg"),
+            }
+            start = time.perf_counter()
+            response = await client.post("/api/virtual-tryon/jobs/try-on-hd", files=files)
+            response.raise_for_status()
+            return response.json()["job_id"], time.perf_counter() - start
+
+        start = time.perf_counter()
+        submitted = await asyncio.gather(*(submit(i) for i in range(args.jobs)))
+        finished = await asyncio.gather(*(
+            follow_by_polling(client, job_id, args.poll_ms / 1000) if i % 2 else follow_by_events(client, job_id)
+            for i, (job_id, _) in enumerate(submitted)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return [latency for _, latency in submitted], finished, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--backend-ms", type=float, default=500.0, help="Stub OOTDiffusion latency per call")
+    parser.add_argument("--workers", type=int, default=2, help="Job workers and in-flight backend calls")
+    parser.add_argument("--poll-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    settings.TRYON_JOB_WORKERS_OOTDIFFUSION = args.workers
+    settings.OOTDIFFUSION_MAX_IN_FLIGHT = args.workers
+    logging.disable(logging.WARNING)
+
+    from app.main import app
+
+    submit_latencies, jobs, elapsed = asyncio.run(run(app, args))
+    submit = latency_summary(submit_latencies, elapsed)
+    failed = [job for job in jobs if job is None or job["status"] != "done"]
+    durations = [job["finished_at"] - job["created_at"] for job in jobs if job and job["status"] == "done"]
+
+    print(f"submit: p50 {submit['p50_ms']:7.2f} ms  p95 {submit['p95_ms']:7.2f} ms")
+    if durations:
+        print(f"jobs:   {len(durations)} done in {elapsed:.2f}s, slowest {max(durations):.2f}s with {args.workers} workers")
+    if failed:
+        print(f"{len(failed)} jobs did not finish: {failed[:3]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Stand-ins for the external pieces the API talks to, for benchmarks."""
+import io
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+
+def make_jpeg(width: int = 768, height: int = 1024, seed: int = 0, quality: int = 90) -> bytes:
+    """Generate a noisy RGB JPEG so decode cost resembles a real photo."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+class StubGarmentClassifier:
+    """CPU-bound stand-in for the ONNX classifier (~`work_ms` of GIL-releasing matmuls)."""
+
+    model_id = "stub"
+
+    def __init__(self, work_ms: float = 30.0):
+        self.work_ms = work_ms
+        self._matrix = np.random.default_rng(0).random((256, 256))
+
+    def is_ready(self) -> bool:
+        return True
+
+    def classify(self, image_bytes) -> tuple[str, float]:
+        deadline = time.perf_counter() + self.work_ms / 1000
+        while time.perf_counter() < deadline:
+            self._matrix @ self._matrix
+        return "t-shirt", 0.97
+
+    def is_restricted(self, image_bytes) -> tuple[bool, str, float]:
+        class_name, confidence = self.classify(image_bytes)
+        return False, class_name, confidence
+
+    def is_restricted_batch(self, images) -> list[tuple[bool, str, float]]:
+        # Batched inference amortizes most of the per-call cost
+        self.classify(None)
+        return [(False, "t-shirt", 0.97) for _ in images]
+
+
+class StubOOTDiffusionClient:
+    """
+    Mimics gradio_client.Client.predict: waits, then returns a result file path.
+
+    Like the real client, each result lands in its own folder under
+    `download_dir` (a fresh temp dir by default).
+    """
+
+    def __init__(self, latency_s: float = 0.05, download_dir: Optional[Path] = None):
+        # The real client pays this import when the pool is created, not on the first call
+        import gradio_client  # noqa: F401
+        self.latency_s = latency_s
+        self._dir = Path(download_dir) if download_dir else Path(tempfile.mkdtemp(prefix="stub_gradio_"))
+        self._result = make_jpeg(384, 512, seed=1)
+
+    def predict(self, *args, **kwargs):
+        time.sleep(self.latency_s)
+        folder = self._dir / uuid.uuid4().hex
+        folder.mkdir(parents=True)
+        path = folder / "image.jpg"
+        path.write_bytes(self._result)
+        return [{"image": str(path.resolve())}]
+
+
+class StubVertexClient:
+    """
+    Mimics google.genai.Client for recontext_image: waits, then returns one
+    generated image whose save(path) writes a JPEG.
+    """
+
+    def __init__(self, latency_s: float = 0.05):
+        import google.genai  # noqa: F401
+        self.latency_s = latency_s
+        self.models = self
+        self._result = make_jpeg(384, 512, seed=4)
+
+    def recontext_image(self, model, source, config=None):
+        time.sleep(self.latency_s)
+        image = SimpleNamespace(save=lambda path: Path(path).write_bytes(self._result))
+        return SimpleNamespace(generated_images=[SimpleNamespace(image=image)])
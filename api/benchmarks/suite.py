@@ -0,0 +1,270 @@
+"""
+Benchmark suite: every hot endpoint, in-process, with JSON output to diff.
+
+Runs each scenario against the app over an in-process ASGI client, with
+stub OOTDiffusion and Vertex clients, synthetic PredictRequest payloads and
+generated images:
+  predict           POST /predict, random measurements
+  predict_batch     POST /predict/batch, --batch-rows rows per request
+  garment_classify  the garment check's batcher + executor path (the ONNX
+                    classifier when its model is present, else the stub)
+  tryon_hd          POST /try-on-hd
+  tryon_dc          POST /try-on-dc
+  tryon_gemini      POST /try-on-gemini
+Caches are turned off and every try-on uses a different garment, so each
+request does the full work. A scenario is timed first, then repeated for
+--memory-requests requests under tracemalloc to get its peak Python heap
+(tracing slows requests down, so it is kept out of the timed pass).
+
+Writes {"meta": ..., "scenarios": {name: {throughput_rps, p50_ms, p95_ms,
+p99_ms, ..., errors, peak_memory_mb}}} to --output (stdout by default).
+Compare two runs with --compare. Run from the api/ directory:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --compare base.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from app.core.config import settings
+from app.services import file_handler, garment_classifier
+from benchmarks.asgi import lifespan_client, latency_summary
+from benchmarks.stubs import StubGarmentClassifier, StubOOTDiffusionClient, StubVertexClient, make_jpeg
+
+SCENARIOS = ("predict", "predict_batch", "garment_classify", "tryon_hd", "tryon_dc", "tryon_gemini")
+
+# Requests per scenario at --scale 1
+DEFAULT_REQUESTS = {
+    "predict": 500,
+    "predict_batch": 100,
+    "garment_classify": 200,
+    "tryon_hd": 60,
+    "tryon_dc": 60,
+    "tryon_gemini": 60,
+}
+
+# Reported per scenario by --compare: (field, higher is better)
+COMPARED = (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("peak_memory_mb", False))
+
+Request = Callable[[int], Awaitable[bool]]
+
+
+def random_payload(rng: random.Random) -> dict:
+    return {
+        "age": rng.randint(18, 70),
+        "height": round(rng.uniform(145, 200), 1),
+        "weight": round(rng.uniform(40, 130), 1),
+        "model_type": rng.choice(list(settings.MODEL_PATHS)),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def run_requests(request: Request, count: int, concurrency: int) -> tuple[List[float], int, float]:
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            start = time.perf_counter()
+            try:
+                ok = await request(index)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_scenario(request: Request, count: int, memory_count: int, concurrency: int) -> dict:
+    # Warm up executors, backend pools and lazily created state before timing
+    await run_requests(request, min(count, concurrency * 2), concurrency)
+
+    latencies, errors, elapsed = await run_requests(request, count, concurrency)
+    result = latency_summary(latencies, elapsed)
+    result["errors"] = errors
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        await run_requests(request, memory_count, concurrency)
+        result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+async def run_suite(app, args) -> Dict[str, dict]:
+    from app.api import virtual_tryon as tryon_routing
+    from app.services import tryon_backends
+
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = lambda: StubOOTDiffusionClient(
+        latency_s=args.backend_ms / 1000, download_dir=file_handler.GRADIO_DOWNLOAD_DIR
+    )
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.VERTEX] = lambda: StubVertexClient(latency_s=args.backend_ms / 1000)
+
+    rng = random.Random(0)
+    person = make_jpeg(seed=2)
+    garments = [make_jpeg(seed=100 + i) for i in range(args.garments)]
+    stub_classifier = StubGarmentClassifier(work_ms=args.classify_ms)
+    results: Dict[str, dict] = {}
+
+    async with lifespan_client(app) as client:
+        await tryon_backends.wait_for_backends()
+        onnx_classifier = garment_classifier.get_garment_classifier()
+        use_onnx = onnx_classifier is not None and onnx_classifier.is_ready()
+
+        # Garment files on disk for the classification scenario, as the route leaves them
+        garment_paths = []
+        for i, garment in enumerate(garments):
+            path = file_handler.UPLOAD_TEMP_DIR / f"bench_garment_{i}.jpg"
+            path.write_bytes(garment)
+            garment_paths.append(path)
+
+        async def predict(index: int) -> bool:
+            response = await client.post("/api/size-suggestion/predict", json=random_payload(rng))
+            return response.status_code == 200
+
+        async def predict_batch(index: int) -> bool:
+            items = [random_payload(rng) for _ in range(args.batch_rows)]
+            response = await client.post("/api/size-suggestion/predict/batch", json={"items": items})
+            return response.status_code == 200
+
+        async def garment_classify(index: int) -> bool:
+            await tryon_routing.get_garment_batcher().submit(garment_paths[index % len(garment_paths)])
+            return True
+
+        def tryon(path: str, data: dict) -> Request:
+            async def request(index: int) -> bool:
+                files = {
+                    "vton_img": ("person.jpg", person, "image/jpeg"),
+                    "garm_img": ("garment.jpg", garments[index % len(garments)], "image/jpeg"),
+                }
+                response = await client.post(f"/api/virtual-tryon/{path}", files=files, data=data)
+                return response.status_code == 200
+            return request
+
+        requests = {
+            "predict": predict,
+            "predict_batch": predict_batch,
+            "garment_classify": garment_classify,
+            "tryon_hd": tryon("try-on-hd", {}),
+            "tryon_dc": tryon("try-on-dc", {"category": "lowerbody"}),
+            "tryon_gemini": tryon("try-on-gemini", {}),
+        }
+
+        try:
+            for name in args.scenarios:
+                garment_classifier._classifier = (
+                    onnx_classifier if name == "garment_classify" and use_onnx else stub_classifier
+                )
+                count = max(1, int(DEFAULT_REQUESTS[name] * args.scale))
+                results[name] = await run_scenario(requests[name], count, min(count, args.memory_requests), args.concurrency)
+                print(
+                    f"{name:17s} {results[name]['throughput_rps']:8.1f} req/s  p95 {results[name]['p95_ms']:8.2f} ms  "
+                    f"{results[name]['errors']} errors",
+                    file=sys.stderr
+                )
+        finally:
+            garment_classifier._classifier = onnx_classifier
+            await file_handler.cleanup_files(*garment_paths)
+
+    if "garment_classify" in results:
+        results["garment_classify"]["classifier"] = "onnx" if use_onnx else "stub"
+    return results
+
+
+def compare(base_path: str, new_path: str):
+    base = json.loads(Path(base_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{base['meta']['commit']} -> {new['meta']['commit']}")
+    for name, new_result in new["scenarios"].items():
+        base_result = base["scenarios"].get(name)
+        if base_result is None:
+            print(f"{name:17s} (new)")
+            continue
+        changes = []
+        for field, higher_is_better in COMPARED:
+            old_value, new_value = base_result.get(field), new_result.get(field)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = change < 0 if higher_is_better else change > 0
+            flag = "!" if worse and abs(change) >= 0.10 else " "
+            changes.append(f"{field} {new_value:9.2f} ({change:+6.1%}){flag}")
+        print(f"{name:17s} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--memory-requests", type=int, default=50, help="Requests in the traced pass")
+    parser.add_argument("--batch-rows", type=int, default=64)
+    parser.add_argument("--garments", type=int, default=64, help="Distinct garment images to cycle through")
+    parser.add_argument("--classify-ms", type=float, default=20.0, help="CPU time per stub garment classification")
+    parser.add_argument("--backend-ms", type=float, default=50.0, help="Stub OOTDiffusion/Vertex latency per call")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Every request does the full work
+    settings.PREDICTION_CACHE_SIZE = 0
+    settings.GARMENT_CACHE_SIZE = 0
+    settings.TRYON_RESULT_CACHE_SIZE = 0
+    logging.disable(logging.WARNING)
+
+    from app.main import app
+
+    started = time.time()
+    scenarios = asyncio.run(run_suite(app, args))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "INFERENCE_EXECUTOR": settings.INFERENCE_EXECUTOR,
+                "INFERENCE_WORKERS": settings.INFERENCE_WORKERS,
+                "FILE_IO_WORKERS": settings.FILE_IO_WORKERS,
+            },
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "scenarios": scenarios,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
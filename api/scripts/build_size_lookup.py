@@ -0,0 +1,110 @@
+"""
+Precompute size predictions for every integer (age, height, weight) on a grid.
+
+For each model in settings.MODEL_PATHS this writes <model>_lut.npy (a
+memory-mappable array of the recommended class and top-3 classes/scores per
+cell) and <model>_lut.json (grid bounds, classes and source file hashes).
+Set SIZE_LOOKUP_DIR to the output directory to serve from the tables; inputs
+off the grid, or with fractional values, still go to the live model.
+
+Run from the api/ directory:
+    python -m scripts.build_size_lookup --output-dir models/lookup
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.model_loader import ModelLoader
+from app.services.predictor import Predictor
+from app.services.size_lookup import (
+    SizeLookupTable,
+    TABLE_DTYPE,
+    TABLE_FORMAT_VERSION,
+    TOP_K,
+    source_digests,
+    table_paths,
+)
+
+
+def build_table(model, preprocessor, output_path: Path, bounds: dict) -> np.ndarray:
+    ages, heights, weights = SizeLookupTable.grid_axes(bounds["age"], bounds["height"], bounds["weight"])
+    table = np.lib.format.open_memmap(
+        output_path, mode="w+", dtype=TABLE_DTYPE,
+        shape=(len(ages), len(heights), len(weights))
+    )
+
+    # One age slice (height x weight plane) per model call keeps memory flat
+    plane_heights, plane_weights = np.meshgrid(heights, weights, indexing="ij")
+    plane_heights = plane_heights.ravel()
+    plane_weights = plane_weights.ravel()
+    plane_shape = (len(heights), len(weights))
+
+    for i, age in enumerate(ages):
+        features = preprocessor.preprocess_batch(
+            np.full(plane_heights.shape, age), plane_heights, plane_weights
+        )
+        predicted = model.predict(features)
+        probas = model.predict_proba(features)
+        top = Predictor.top_k_indices(probas, TOP_K)
+
+        plane = table[i]
+        plane["size"] = np.searchsorted(model.classes_, predicted).reshape(plane_shape)
+        plane["top_classes"] = top.reshape(*plane_shape, TOP_K)
+        plane["top_scores"] = np.take_along_axis(probas, top, axis=1).reshape(*plane_shape, TOP_K)
+
+    table.flush()
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", type=Path, default=Path(settings.SIZE_LOOKUP_DIR or "models/lookup"))
+    parser.add_argument("--age", type=int, nargs=2, default=[10, 90], metavar=("MIN", "MAX"), help="Age range in years")
+    parser.add_argument("--height", type=int, nargs=2, default=[130, 215], metavar=("MIN", "MAX"), help="Height range in cm")
+    parser.add_argument("--weight", type=int, nargs=2, default=[30, 180], metavar=("MIN", "MAX"), help="Weight range in kg")
+    args = parser.parse_args()
+
+    bounds = {"age": args.age, "height": args.height, "weight": args.weight}
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    model_loader = ModelLoader()
+    if not model_loader.load_model():
+        raise SystemExit("No models could be loaded")
+    preprocessor = model_loader.get_preprocessor()
+    if preprocessor.scaler is None:
+        raise SystemExit("Feature scaler is required to build lookup tables")
+
+    for model_name, model_path in settings.MODEL_PATHS.items():
+        model = model_loader.get_model(model_name)
+        if model is None or not hasattr(model, "predict_proba"):
+            print(f"{model_name}: not loaded or has no predict_proba, skipping")
+            continue
+
+        table_path, meta_path = table_paths(args.output_dir, model_name)
+        start = time.perf_counter()
+        table = build_table(model, preprocessor, table_path, bounds)
+
+        metadata = {
+            "format_version": TABLE_FORMAT_VERSION,
+            "model_type": model_name,
+            "model_version": settings.MODEL_VERSION,
+            "classes": np.asarray(model.classes_).tolist(),
+            **bounds,
+            "top_k": TOP_K,
+            "sources": source_digests(settings.FEATURE_SCALER_PATH, model_path),
+        }
+        with open(meta_path, "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        print(
+            f"{model_name}: {table.size} cells -> {table_path} "
+            f"({table_path.stat().st_size / 1024 / 1024:.1f} MB) in {time.perf_counter() - start:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compile the pickled size models and scaler into .npz artifacts.
+
+Each pickle in settings.MODEL_PATHS and settings.FEATURE_SCALER_PATH is
+exported next to the original (or into --output-dir), then checked for
+parity against the pickled estimator on a synthetic input grid. The script
+exits non-zero if any compiled model disagrees with its source.
+
+Run from the api/ directory:
+    python -m scripts.export_models
+
+Point MODEL_DECISION_TREE_PATH, MODEL_NEURAL_NETWORK_PATH and
+FEATURE_SCALER_PATH at the generated .npz files to serve without scikit-learn.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.core.config import settings
+from app.services.compiled_models import export_estimator, load_compiled
+
+
+def parity_inputs(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    ages = rng.uniform(10, 90, n)
+    heights = rng.uniform(130, 215, n)
+    weights = rng.uniform(30, 180, n)
+    return np.column_stack((ages, heights, weights, heights / weights, weights * weights))
+
+
+def check_parity(name: str, original, compiled, X: np.ndarray) -> bool:
+    if hasattr(original, "transform") and not hasattr(original, "predict"):
+        diff = np.abs(original.transform(X) - compiled.transform(X)).max()
+        ok = diff == 0.0
+        print(f"  {name}: transform max |diff| = {diff:.3g} -> {'OK' if ok else 'MISMATCH'}")
+        return ok
+
+    labels_match = np.array_equal(original.predict(X), compiled.predict(X))
+    diff = np.abs(original.predict_proba(X) - compiled.predict_proba(X)).max()
+    ok = labels_match and diff <= 1e-12
+    print(
+        f"  {name}: labels {'identical' if labels_match else 'DIFFER'}, "
+        f"predict_proba max |diff| = {diff:.3g} -> {'OK' if ok else 'MISMATCH'}"
+    )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", type=Path, default=None, help="Directory for .npz files (default: next to each pickle)")
+    parser.add_argument("--samples", type=int, default=100000, help="Rows in the parity grid")
+    args = parser.parse_args()
+
+    sources = {"scaler": settings.FEATURE_SCALER_PATH, **settings.MODEL_PATHS}
+
+    X_raw = parity_inputs(args.samples)
+    scaler = joblib.load(settings.FEATURE_SCALER_PATH)
+    X_scaled = scaler.transform(X_raw)
+
+    all_ok = True
+    for name, source in sources.items():
+        source = Path(source)
+        if source.suffix == ".npz":
+            print(f"{name}: {source} is already compiled, skipping")
+            continue
+
+        target_dir = args.output_dir or source.parent
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        original = joblib.load(source)
+        output_path = export_estimator(original, target_dir / source.name)
+        compiled = load_compiled(output_path)
+
+        print(f"{name}: {source} ({source.stat().st_size} B) -> {output_path} ({output_path.stat().st_size} B)")
+        X = X_raw if name == "scaler" else X_scaled
+        all_ok &= check_parity(name, original, compiled, X)
+
+    if not all_ok:
+        print("Parity check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Shared fixtures. Run from the api/ directory:
+    python -m pytest
+Settings default to the size models in models/; the try-on backends are
+replaced by the stubs in benchmarks/stubs.py.
+"""
+import os
+
+os.environ.setdefault("MODEL_DECISION_TREE_PATH", "models/decision_tree_model.pkl")
+os.environ.setdefault("MODEL_NEURAL_NETWORK_PATH", "models/mlp_model.pkl")
+os.environ.setdefault("FEATURE_SCALER_PATH", "models/features_scaler.pkl")
+os.environ.setdefault("MODEL_VERSION", "test")
+os.environ.setdefault("CLOTHING_CLASSIFIER_MODEL_PATH", "models/clothing.onnx")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "test")
+os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+os.environ.setdefault("VIRTUAL_TRY_ON_MODEL", "virtual-try-on-001")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app as fastapi_app
+from app.services import file_handler, tryon_backends
+from benchmarks.stubs import StubOOTDiffusionClient, StubVertexClient
+
+
+@pytest.fixture(scope="session")
+def app():
+    return fastapi_app
+
+
+@pytest.fixture
+def client(app):
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.OOTDIFFUSION] = lambda: StubOOTDiffusionClient(
+        latency_s=0, download_dir=file_handler.GRADIO_DOWNLOAD_DIR
+    )
+    tryon_backends.CLIENT_FACTORIES[tryon_backends.VERTEX] = lambda: StubVertexClient(latency_s=0)
+    with TestClient(app) as client:
+        yield client
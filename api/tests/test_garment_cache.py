@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.api import virtual_tryon
+from app.core.config import settings
+from app.services import garment_classifier
+from app.services.garment_cache import GarmentVerdictCache
+from benchmarks.stubs import StubGarmentClassifier
+
+
+def test_model_change_reopens_cache_off_the_loop_and_closes_the_old_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GARMENT_CACHE_PATH", str(tmp_path / "verdicts.db"))
+    monkeypatch.setattr(virtual_tryon, "GARMENT_CACHE", None)
+    classifier = StubGarmentClassifier(work_ms=0)
+    monkeypatch.setattr(garment_classifier, "_classifier", classifier)
+
+    opened_on = []
+    open_db = GarmentVerdictCache._open_db
+
+    def recording_open_db(self, *args):
+        opened_on.append(threading.current_thread())
+        open_db(self, *args)
+
+    monkeypatch.setattr(GarmentVerdictCache, "_open_db", recording_open_db)
+
+    async def scenario():
+        first = await virtual_tryon.get_garment_cache()
+        first.put_verdict("digest", (False, "shirt", 0.9))
+        assert await virtual_tryon.get_garment_cache() is first
+
+        classifier.model_id = "stub-v2"
+        second = await virtual_tryon.get_garment_cache()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert second is not first and second.model_id == "stub-v2"
+    assert first._db is None
+    assert first.get_verdict("other") is None
+    assert second.get_verdict("digest") is None
+    assert len(opened_on) == 2
+    assert threading.main_thread() not in opened_on
+    second.close()
@@ -0,0 +1,21 @@
+import asyncio
+import logging
+
+from app.core.executor import InferenceExecutor
+from app.core.logging import setup_logging
+from app.services import inference_tasks
+
+
+def log_from_worker(message: str):
+    logging.getLogger("tests.worker").warning(message)
+
+
+def test_process_worker_logs_are_written(app, capfd):
+    setup_logging()
+    executor = InferenceExecutor("process", max_workers=1, initializer=inference_tasks.init_worker)
+    try:
+        asyncio.run(executor.run(log_from_worker, "hello from the worker"))
+    finally:
+        executor.shutdown()
+
+    assert "[WARNING] [system] [-] tests.worker: hello from the worker" in capfd.readouterr().out
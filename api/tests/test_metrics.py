@@ -0,0 +1,12 @@
+def test_request_metrics_label_routes_with_their_router_prefix(client):
+    client.get("/api/size-suggestion/")
+    client.get("/api/virtual-tryon/jobs/missing")
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/size-suggestion/",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/api/virtual-tryon/jobs/{job_id}",status="404"}' in text
+    assert 'route="/"' not in text
+
+
+def test_metrics_export_coalesced_tryon_calls(client):
+    assert 'single_flight_coalesced_calls_total{flight="tryon"}' in client.get("/metrics").text
@@ -0,0 +1,26 @@
+from app.schemas.size_suggestion import PredictRequest
+
+
+def predict(client, **measurements) -> str:
+    response = client.post("/api/size-suggestion/predict", json=measurements)
+    assert response.status_code == 200
+    return response.json()["recommended_size"]
+
+
+def test_nearby_inputs_each_get_the_models_own_answer(client, app):
+    predictor = app.state.model_loader.get_predictor("decision_tree")
+    # Both weights round to 75.0, and sit on either side of a split in the tree
+    first = {"age": 54, "height": 164, "weight": 75.04}
+    second = {"age": 54, "height": 164, "weight": 74.96}
+    expected = [predictor.predict(PredictRequest(**row)).recommended_size for row in (first, second)]
+    assert expected[0] != expected[1]
+
+    assert [predict(client, **first), predict(client, **second)] == expected
+    # Served from the cache now, still the same answers
+    assert [predict(client, **first), predict(client, **second)] == expected
+
+
+def test_predict_matches_batch(client):
+    rows = [{"age": 26.52, "height": 189.35, "weight": 70.03}, {"age": 54, "height": 164, "weight": 74.96}]
+    batch = client.post("/api/size-suggestion/predict/batch", json={"items": rows}).json()["predictions"]
+    assert [predict(client, **row) for row in rows] == [p["recommended_size"] for p in batch]
@@ -0,0 +1,33 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.services import tryon_backends
+from benchmarks.stubs import make_jpeg
+
+
+def unreachable_backend():
+    time.sleep(1.0)
+    raise ConnectionError("backend unreachable")
+
+
+def test_job_submit_does_not_wait_for_backend_connect(app, monkeypatch):
+    monkeypatch.setitem(tryon_backends.CLIENT_FACTORIES, tryon_backends.OOTDIFFUSION, unreachable_backend)
+    files = {
+        "vton_img": ("person.jpg", make_jpeg(256, 256, seed=1), "image/jpeg"),
+        "garm_img": ("garment.jpg", make_jpeg(256, 256, seed=2), "image/jpeg"),
+    }
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        response = client.post("/api/virtual-tryon/jobs/try-on-hd", files=files)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 202
+        assert elapsed < 0.5
+
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + 10
+        while (job := client.get(f"/api/virtual-tryon/jobs/{job_id}").json())["status"] not in ("done", "failed"):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert job["status"] == "failed"
+        assert "Failed to connect" in job["error"]